@@ -0,0 +1,144 @@
+"""
+A small in-memory IMAP server for the benchmarks.
+
+It implements just the commands the dashboard sends: LOGIN, CAPABILITY
+(advertising CONDSTORE), STATUS, EXAMINE/SELECT, CLOSE, UID SEARCH, UID
+FETCH (flags with CHANGEDSINCE, and preview headers) and LOGOUT. Any
+username and password are accepted and every account sees the same
+mailboxes.
+"""
+
+import random
+import re
+import socketserver
+import threading
+
+class Mailbox:
+    def __init__(self, uidvalidity=1):
+        self.uidvalidity = uidvalidity
+        self.uidnext = 1
+        self.modseq = 1
+        self.messages = {}
+
+    def add(self, sender, subject, seen=False):
+        self.modseq += 1
+        header = (f"From: {sender}\r\nSubject: {subject}\r\n"
+                  f"Date: Mon, 1 Jan 2024 00:00:00 +0000\r\n\r\n").encode()
+        self.messages[self.uidnext] = {'seen': seen, 'modseq': self.modseq, 'header': header}
+        self.uidnext += 1
+
+    def unseen(self):
+        return sorted(uid for uid, message in self.messages.items() if not message['seen'])
+
+def _uid_set(spec, max_uid):
+    uids = set()
+    for part in spec.split(','):
+        if ':' in part:
+            start, end = part.split(':')
+            start = max_uid if start == '*' else int(start)
+            end = max_uid if end == '*' else int(end)
+            uids.update(range(min(start, end), max(start, end) + 1))
+        else:
+            uids.add(max_uid if part == '*' else int(part))
+    return uids
+
+_quoted_re = re.compile(r'"((?:[^"\\]|\\.)*)"')
+
+class _Handler(socketserver.StreamRequestHandler):
+    def send(self, text):
+        self.wfile.write(text.encode() if isinstance(text, str) else text)
+
+    def handle(self):
+        mailboxes = self.server.mailboxes
+        selected = None
+        self.send('* OK fake IMAP ready\r\n')
+        for raw in self.rfile:
+            line = raw.decode().strip()
+            if not line:
+                continue
+            tag, _, rest = line.partition(' ')
+            command, _, args = rest.partition(' ')
+            command = command.upper()
+
+            if command == 'CAPABILITY':
+                self.send(f'* CAPABILITY IMAP4rev1 CONDSTORE\r\n{tag} OK done\r\n')
+            elif command == 'LOGIN':
+                self.send(f'{tag} OK logged in\r\n')
+            elif command == 'STATUS':
+                name = _quoted_re.match(args).group(1)
+                box = mailboxes[name]
+                self.send(f'* STATUS "{name}" (UNSEEN {len(box.unseen())} UIDNEXT {box.uidnext} '
+                          f'UIDVALIDITY {box.uidvalidity} HIGHESTMODSEQ {box.modseq})\r\n{tag} OK done\r\n')
+            elif command in ('SELECT', 'EXAMINE'):
+                selected = mailboxes[_quoted_re.match(args).group(1)]
+                self.send(f'* {len(selected.messages)} EXISTS\r\n{tag} OK [READ-ONLY] done\r\n')
+            elif command == 'CLOSE':
+                selected = None
+                self.send(f'{tag} OK done\r\n')
+            elif command == 'UID':
+                self.uid_command(tag, args, selected)
+            elif command == 'LOGOUT':
+                self.send(f'* BYE\r\n{tag} OK done\r\n')
+                return
+            else:
+                self.send(f'{tag} BAD unsupported\r\n')
+
+    def uid_command(self, tag, args, box):
+        command, _, args = args.partition(' ')
+        command = command.upper()
+        max_uid = max(box.messages) if box.messages else 0
+        if command == 'SEARCH':
+            uids = set(box.unseen())
+            match = re.search(r'UID (\S+)', args)
+            if match:
+                uids &= _uid_set(match.group(1), max_uid)
+            self.send('* SEARCH' + ''.join(f' {uid}' for uid in sorted(uids)) + f'\r\n{tag} OK done\r\n')
+        elif command == 'FETCH':
+            spec, _, items = args.partition(' ')
+            changed_since = re.search(r'CHANGEDSINCE (\d+)', items)
+            uids = sorted(_uid_set(spec, max_uid) & set(box.messages))
+            for sequence, uid in enumerate(uids, 1):
+                message = box.messages[uid]
+                if changed_since and message['modseq'] <= int(changed_since.group(1)):
+                    continue
+                if 'HEADER.FIELDS' in items:
+                    header = message['header']
+                    self.send(f'* {sequence} FETCH (UID {uid} BODY[HEADER.FIELDS (FROM SUBJECT DATE)] '
+                              f'{{{len(header)}}}\r\n')
+                    self.send(header)
+                    self.send(')\r\n')
+                else:
+                    flags = '\\Seen' if message['seen'] else ''
+                    self.send(f'* {sequence} FETCH (UID {uid} FLAGS ({flags}) MODSEQ ({message["modseq"]}))\r\n')
+            self.send(f'{tag} OK done\r\n')
+        else:
+            self.send(f'{tag} BAD unsupported\r\n')
+
+class FakeImapServer(socketserver.ThreadingTCPServer):
+    """Serves the given mailboxes on localhost (port 0 picks a free port)"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, mailboxes, port=0):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.mailboxes = mailboxes
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="fake-imap", daemon=True).start()
+
+def make_mailboxes(names, messages, unseen_ratio=0.3, seed=0):
+    """Mailboxes filled with synthetic messages, some of them unread"""
+    rng = random.Random(seed)
+    mailboxes = {}
+    for name in names:
+        box = Mailbox()
+        for i in range(messages):
+            box.add(f"Sender {i} <sender{i}@example.com>", f"Message {i} in {name}",
+                    seen=rng.random() >= unseen_ratio)
+        mailboxes[name] = box
+    return mailboxes
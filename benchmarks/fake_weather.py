@@ -0,0 +1,64 @@
+"""
+A canned Open-Meteo forecast endpoint for the benchmarks.
+
+Every request gets the same generated response: current conditions plus
+hourly temperature, precipitation and weather codes for the requested
+number of days, starting at the current hour.
+"""
+
+import json
+import math
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+def make_forecast(days=2):
+    """An Open-Meteo style response with hourly arrays for the given number of days"""
+    start = datetime.now().replace(minute=0, second=0, microsecond=0)
+    first = start.replace(hour=0)
+    hours = [first + timedelta(hours=i) for i in range(days * 24)]
+    return {
+        'current': {
+            'time': start.strftime('%Y-%m-%dT%H:%M'),
+            'temperature_2m': 12.3,
+            'relative_humidity_2m': 64,
+            'wind_speed_10m': 11.5,
+            'weather_code': 3,
+        },
+        'hourly': {
+            'time': [hour.strftime('%Y-%m-%dT%H:%M') for hour in hours],
+            'temperature_2m': [round(10 + 6 * math.sin((i - 9) / 24 * 2 * math.pi), 1) for i in range(len(hours))],
+            'precipitation': [0.6 if 14 <= i % 24 <= 17 else 0.0 for i in range(len(hours))],
+            'weather_code': [61 if 14 <= i % 24 <= 17 else 3 for i in range(len(hours))],
+        },
+    }
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        days = int(query.get('forecast_days', ['1'])[0])
+        body = json.dumps(make_forecast(days)).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class FakeWeatherServer(ThreadingHTTPServer):
+    """Serves canned forecasts on localhost (port 0 picks a free port)"""
+
+    daemon_threads = True
+
+    def __init__(self, port=0):
+        super().__init__(('127.0.0.1', port), _Handler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1/forecast"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="fake-weather", daemon=True).start()
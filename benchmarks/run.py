@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Benchmark the dashboard pipeline on a synthetic workload.
+
+Builds a synthetic project group (see workload.py), starts a fake IMAP
+server and a canned weather endpoint, and writes a config.toml pointing the
+dashboard at them. Config, cache and dist folders all live in a temporary
+directory, so the real dashboard is left alone. Each stage is then timed
+in a fresh process, both cold (empty cache folder) and warm (caches from
+the previous run), and the medians are compared with the stored baseline.
+
+    python benchmarks/run.py --save-baseline   # on the known-good version
+    python benchmarks/run.py                   # after a change
+
+The exit status is 1 when a stage is slower than the baseline by more than
+the tolerance.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+BASELINE_FILE = BENCH_DIR / "baseline.json"
+
+# Stages in pipeline order; "generate" is a whole one-shot run including imports
+STAGES = ['discovery', 'scan', 'progress', 'projects', 'email', 'weather', 'render', 'generate']
+PHASES = ['cold', 'warm']
+
+# Slowdowns smaller than this are timer noise, whatever the percentage
+MIN_DELTA = 0.005
+
+def run_stage(stage):
+    """Time one stage in this process and return the seconds it took"""
+    start = time.perf_counter()
+    sys.path.insert(0, str(REPO_DIR))
+    import generate_dashboard as dashboard
+    from config import discover_projects, get_project_paths
+
+    if stage == 'generate':
+        dashboard.generate_dashboard(force=True)
+        return time.perf_counter() - start
+
+    if stage == 'discovery':
+        # get_config() runs discovery (and caches it in memory and on disk), so
+        # it has to be timed first
+        start = time.perf_counter()
+        discover_projects()
+        return time.perf_counter() - start
+
+    # Imports and config parsing happen once per process whatever the stage
+    # (the "generate" stage includes them), so load them up front
+    dashboard.get_config()
+    import jinja2, mail, models, weather  # noqa: F401,E401
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        pass
+
+    if stage == 'render':
+        # Rendering needs data; collecting it isn't part of the timing
+        data = (dashboard.get_email_counts(), dashboard.get_weather(), dashboard.collect_projects())
+        # A page already rendered from the same inputs is skipped; forget its
+        # inputs so the warm phase still times a render
+        from output import OutputWriter
+        writer = OutputWriter.load()
+        writer.set_page_key(dashboard.DIST_DIR / 'dashboard.html', None)
+        writer.save()
+
+    start = time.perf_counter()
+    if stage == 'scan':
+        for project_path in get_project_paths():
+            dashboard.get_latest_mtime(project_path)
+        dashboard.get_scan_index().save()
+    elif stage == 'progress':
+        for project_path in get_project_paths():
+            dashboard.get_test_progress(project_path)
+        dashboard.get_progress_cache().save()
+    elif stage == 'projects':
+        dashboard.collect_projects()
+    elif stage == 'email':
+        dashboard.get_email_counts()
+    elif stage == 'weather':
+        dashboard.get_weather()
+    elif stage == 'render':
+        dashboard.render_dashboard(*data)
+    elapsed = time.perf_counter() - start
+
+    if stage in ('email', 'render', 'generate'):
+        dashboard.get_imap_pool().close_all()
+    return elapsed
+
+def write_config(path, group_path, imap_port, mailboxes, weather_url, forecast):
+    # json.dumps gives valid TOML basic strings and arrays
+    path.write_text(f"""[weather]
+city = "Benchmark"
+lat = 51.0
+long = -114.0
+api_url = {json.dumps(weather_url)}
+forecast = {'true' if forecast else 'false'}
+
+[[email]]
+name = "bench"
+user = "bench@example.com"
+password = "bench"
+host = "127.0.0.1"
+port = {imap_port}
+use_ssl = false
+mailboxes = {json.dumps(mailboxes)}
+
+[projects]
+project_roots = []
+project_groups = [{json.dumps(str(group_path))}]
+""")
+
+def time_stage(stage, env, cache_dir, cold):
+    if cold:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    result = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), '--worker', stage],
+        env=env, cwd=REPO_DIR, capture_output=True, text=True
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith('RESULT '):
+            return float(line.split()[1])
+    raise RuntimeError(f"{stage} failed:\n{result.stdout}{result.stderr}")
+
+def compare(results, baseline, tolerance):
+    """Print results against the baseline, returning the stages that regressed"""
+    regressions = []
+    print(f"{'stage':<20}{'median':>12}{'baseline':>12}{'change':>10}")
+    for key, seconds in results.items():
+        line = f"{key:<20}{seconds * 1000:>10.1f}ms"
+        base = (baseline or {}).get(key)
+        if base is not None:
+            change = (seconds - base) / base if base else 0
+            line += f"{base * 1000:>10.1f}ms{change:>+10.0%}"
+            if seconds > base * (1 + tolerance) and seconds - base > MIN_DELTA:
+                line += "  REGRESSION"
+                regressions.append(key)
+        print(line)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the dashboard on a synthetic workload')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--projects', type=int, default=30, help='Number of projects')
+    parser.add_argument('--files', type=int, default=200, help='Source files per project')
+    parser.add_argument('--depth', type=int, default=4, help='Folder nesting depth')
+    parser.add_argument('--git', type=float, default=0.5, help='Share of projects that are git repositories')
+    parser.add_argument('--checklists', type=float, default=0.5, help='Share of projects with a checklist')
+    parser.add_argument('--tests', type=float, default=0.2, help='Share of projects with acceptance tests')
+    parser.add_argument('--mailboxes', type=int, default=3, help='Mailboxes on the fake IMAP server')
+    parser.add_argument('--messages', type=int, default=500, help='Messages per mailbox')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage and phase (the median is kept)')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help='Stages to run')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown against the baseline')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--keep', action='store_true', help="Keep the temporary workload folder")
+    args = parser.parse_args()
+
+    if args.worker:
+        print(f"RESULT {run_stage(args.worker)}")
+        return 0
+
+    sys.path.insert(0, str(BENCH_DIR))
+    from workload import Workload, generate_projects
+    from fake_imap import FakeImapServer, make_mailboxes
+    from fake_weather import FakeWeatherServer
+
+    workload = Workload(projects=args.projects, files=args.files, depth=args.depth, git=args.git,
+                        checklists=args.checklists, tests=args.tests)
+    settings = {**workload.model_dump(), 'mailboxes': args.mailboxes, 'messages': args.messages}
+
+    root = Path(tempfile.mkdtemp(prefix="dashboard-bench-"))
+    try:
+        print(f"Generating {workload.projects} projects in {root}")
+        group_path = generate_projects(root / 'projects', workload)
+
+        mailbox_names = ['INBOX'] + [f"Folder{i}" for i in range(1, args.mailboxes)]
+        imap = FakeImapServer(make_mailboxes(mailbox_names, args.messages))
+        imap.start()
+        weather = FakeWeatherServer()
+        weather.start()
+
+        try:
+            import numpy  # noqa: F401
+            forecast = True
+        except ImportError:
+            forecast = False
+        config_path = root / 'config.toml'
+        write_config(config_path, group_path, imap.port, mailbox_names, weather.url, forecast)
+
+        cache_dir = root / 'cache'
+        env = {**os.environ, 'DASHBOARD_CONFIG': str(config_path),
+               'DASHBOARD_CACHE_DIR': str(cache_dir), 'DASHBOARD_DIST_DIR': str(root / 'dist')}
+
+        results = {}
+        for stage in args.stages:
+            for phase in PHASES:
+                times = [time_stage(stage, env, cache_dir, cold=(phase == 'cold'))
+                         for _ in range(args.repeat)]
+                results[f"{stage}.{phase}"] = statistics.median(times)
+
+        imap.shutdown()
+        weather.shutdown()
+    finally:
+        if args.keep:
+            print(f"Workload kept in {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    baseline = None
+    if BASELINE_FILE.exists():
+        stored = json.loads(BASELINE_FILE.read_text())
+        if stored.get('settings') == settings:
+            baseline = stored['results']
+        else:
+            print("The baseline was recorded with a different workload, not comparing")
+
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        BASELINE_FILE.write_text(json.dumps({'settings': settings, 'results': results}, indent=2) + '\n')
+        print(f"Baseline saved to {BASELINE_FILE}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} stage(s) slower than the baseline by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Synthetic project trees for the benchmarks.
+
+generate_projects() lays out a project group with the requested number of
+projects. Each project gets source files spread over nested folders, an
+ignored node_modules folder and, for a configurable share of projects, a
+git repository with one commit, an acceptance checklist and a
+tests/acceptance.py suite. The layout only depends on the parameters and
+the seed, so runs with the same workload are comparable.
+"""
+
+import os
+import random
+import subprocess
+from pathlib import Path
+
+from pydantic import BaseModel
+
+class Workload(BaseModel):
+    """Shape of the synthetic project group (fractions are shares of projects)"""
+    projects: int = 30
+    files: int = 200
+    depth: int = 4
+    git: float = 0.5
+    checklists: float = 0.5
+    tests: float = 0.2
+    seed: int = 0
+
+CHECKLIST_TEMPLATE = """# {name} Acceptance
+
+Last modified: 2024-01-15
+
+{items}
+"""
+
+TEST_TEMPLATE = """def test_passes():
+    assert True
+
+def test_also_passes():
+    assert 1 + 1 == 2
+
+def test_fails():
+    assert {fails} is False
+"""
+
+def _git(project_path, *args):
+    env = {**os.environ, 'GIT_AUTHOR_NAME': 'bench', 'GIT_AUTHOR_EMAIL': 'bench@example.com',
+           'GIT_COMMITTER_NAME': 'bench', 'GIT_COMMITTER_EMAIL': 'bench@example.com'}
+    subprocess.run(['git', *args], cwd=project_path, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def generate_project(project_path, workload, rng):
+    project_path.mkdir(parents=True)
+
+    # A folder tree workload.depth levels deep, files spread across it
+    folders = [Path('.')]
+    for level in range(1, workload.depth + 1):
+        parent = rng.choice(folders)
+        for i in range(rng.randint(1, 3)):
+            folders.append(parent / f"dir{level}_{i}")
+    for folder in folders:
+        (project_path / folder).mkdir(parents=True, exist_ok=True)
+    for i in range(workload.files):
+        path = project_path / rng.choice(folders) / f"module_{i}.py"
+        path.write_text(f"# synthetic module {i}\nVALUE = {rng.randint(0, 1000)}\n")
+
+    # Pruned by the default ignore rules
+    vendored = project_path / 'node_modules' / 'package'
+    vendored.mkdir(parents=True)
+    for i in range(workload.files // 4):
+        (vendored / f"index_{i}.js").write_text("module.exports = {};\n")
+    (project_path / '.gitignore').write_text("build/\n*.log\n")
+
+    if rng.random() < workload.checklists:
+        done = rng.randint(0, 10)
+        items = '\n'.join(['- [x] Done item'] * done + ['- [ ] Open item'] * (10 - done))
+        checklist_path = project_path / 'docs' / 'acceptance_checklist.md'
+        checklist_path.parent.mkdir(exist_ok=True)
+        checklist_path.write_text(CHECKLIST_TEMPLATE.format(name=project_path.name, items=items))
+
+    if rng.random() < workload.tests:
+        test_path = project_path / 'tests' / 'acceptance.py'
+        test_path.parent.mkdir(exist_ok=True)
+        test_path.write_text(TEST_TEMPLATE.format(fails=rng.random() < 0.5))
+
+    if rng.random() < workload.git:
+        _git(project_path, 'init', '-q')
+        _git(project_path, 'add', '-A')
+        _git(project_path, 'commit', '-q', '-m', 'Initial commit')
+
+def generate_projects(group_path, workload):
+    """Create workload.projects synthetic projects inside group_path"""
+    rng = random.Random(workload.seed)
+    group_path = Path(group_path)
+    group_path.mkdir(parents=True, exist_ok=True)
+    for i in range(workload.projects):
+        generate_project(group_path / f"project_{i:03d}", workload, rng)
+    return group_path
@@ -0,0 +1,79 @@
+"""
+Small helpers for the on-disk cache that is kept between dashboard runs.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+# Cached state lives next to the generator, outside of the published dist folder
+# (DASHBOARD_CACHE_DIR moves it, e.g. for the benchmarks)
+CACHE_DIR = Path(os.environ.get('DASHBOARD_CACHE_DIR', Path(__file__).parent / ".cache"))
+
+def load_json(name, default=None):
+    """Load a cached JSON document, returning default if it is missing or unreadable"""
+    try:
+        with open(CACHE_DIR / name, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+class AtomicFile:
+    """A temp file in the same folder as path, renamed over it by commit()
+
+    Readers see either the old file or the new one, never a partial write.
+    Leaving the with block without commit() removes the temp file and leaves
+    path untouched. Without a mode the file keeps its current permissions
+    (0644 if new).
+    """
+
+    def __init__(self, path, mode=None):
+        self.path = Path(path)
+        if mode is None:
+            try:
+                mode = self.path.stat().st_mode & 0o777
+            except OSError:
+                mode = 0o644
+        fd, self.tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            os.fchmod(fd, mode)
+            self.file = os.fdopen(fd, 'wb')
+        except BaseException:
+            os.close(fd)
+            os.unlink(self.tmp_path)
+            raise
+        self.committed = False
+
+    def write(self, data):
+        self.file.write(data)
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+        self.committed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if not self.committed:
+            # Don't leave partial temp files behind
+            self.file.close()
+            try:
+                os.unlink(self.tmp_path)
+            except OSError:
+                pass
+        return False
+
+def write_atomic(path, text, mode=None):
+    """Write text to path via a temp file in the same folder + rename"""
+    with AtomicFile(path, mode) as f:
+        f.write(text.encode('utf-8'))
+        f.commit()
+
+def save_json(name, data):
+    """Write a JSON document to the cache folder via temp file + rename"""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # The cache holds mail previews, so keep it private
+    write_atomic(CACHE_DIR / name, json.dumps(data), mode=0o600)
@@ -0,0 +1,162 @@
+"""
+Acceptance checklists: a streaming parser and a stat-keyed index.
+
+parse_checklist() reads a checklist once, line by line, counting checked
+and unchecked list items (nested and numbered items included, fenced code
+blocks skipped) per heading, and picking up the ``Last modified:`` date.
+
+A project can have several checklists: the two historical locations and
+any ``*.md`` file in ``docs/checklists/``. ChecklistIndex keeps each file's
+parse result in the cache folder keyed on its size and mtime, so a
+checklist that hasn't changed costs a single stat.
+"""
+
+import os
+import re
+import threading
+from datetime import datetime
+
+from cache import load_json, save_json
+from profiling import count
+
+INDEX_FILE = "checklists.json"
+
+# Checked in this order; the first one found is the project's main checklist
+CHECKLIST_PATHS = ("docs/planning/acceptance.md", "docs/acceptance_checklist.md")
+# Every markdown file in here is a checklist as well
+CHECKLIST_DIR = "docs/checklists"
+
+_heading_re = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+_item_re = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+\[([ xX])\]')
+_last_modified_re = re.compile(r'Last modified:\s*(\d{4}-\d{2}-\d{2})')
+
+def parse_checklist(path):
+    """Read a checklist in one pass
+
+    Returns {'done', 'todo', 'last_modified' (timestamp, 0 if missing),
+    'sections': [{'title', 'level', 'done', 'todo'}, ...]}. Items count
+    towards the nearest heading above them; only sections with items are
+    listed.
+    """
+    sections = []
+    section = {'title': '', 'level': 0, 'done': 0, 'todo': 0}
+    done = todo = 0
+    last_modified = 0
+    in_code = False
+    size = 0
+
+    with open(path, 'r', errors='replace') as f:
+        for line in f:
+            size += len(line)
+            stripped = line.lstrip()
+            if stripped.startswith(('```', '~~~')):
+                in_code = not in_code
+                continue
+            if in_code:
+                continue
+
+            if stripped.startswith('#'):
+                heading = _heading_re.match(line)
+                if heading:
+                    if section['done'] or section['todo']:
+                        sections.append(section)
+                    section = {'title': heading.group(2), 'level': len(heading.group(1)), 'done': 0, 'todo': 0}
+                    continue
+
+            item = _item_re.match(line)
+            if item:
+                if item.group(1) == ' ':
+                    section['todo'] += 1
+                    todo += 1
+                else:
+                    section['done'] += 1
+                    done += 1
+                continue
+
+            if not last_modified and 'Last modified:' in line:
+                match = _last_modified_re.search(line)
+                if match:
+                    try:
+                        last_modified = datetime.strptime(match.group(1), '%Y-%m-%d').timestamp()
+                    except ValueError:
+                        pass
+
+    if section['done'] or section['todo']:
+        sections.append(section)
+    count('bytes_read', size)
+    return {'done': done, 'todo': todo, 'last_modified': last_modified, 'sections': sections}
+
+def find_checklists(project_path):
+    """Return [(path, stat result), ...] for every checklist in a project"""
+    found = []
+    for relative in CHECKLIST_PATHS:
+        path = os.path.join(project_path, relative)
+        try:
+            found.append((path, os.stat(path)))
+        except OSError:
+            continue
+    try:
+        with os.scandir(os.path.join(project_path, CHECKLIST_DIR)) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if entry.name.endswith('.md') and not entry.name.startswith('.') and entry.is_file():
+                    found.append((entry.path, entry.stat()))
+    except OSError:
+        pass
+    count('files_stat', len(found))
+    return found
+
+class ChecklistIndex:
+    """Parsed checklists, keyed on (path, size, mtime) and persisted in the cache folder"""
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+        self.seen = set()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        return cls(load_json(INDEX_FILE, {}))
+
+    def save(self):
+        with self.lock:
+            # Keep checklists seen this run, and any that still exist
+            entries = {
+                path: entry for path, entry in self.entries.items()
+                if path in self.seen or os.path.exists(path)
+            }
+        save_json(INDEX_FILE, entries)
+
+    def get(self, path, st):
+        """Return the parse result for a checklist, re-reading it only if its size or mtime changed"""
+        with self.lock:
+            self.seen.add(path)
+            entry = self.entries.get(path)
+        if entry is not None and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime_ns:
+            return entry['result']
+
+        result = parse_checklist(path)
+        with self.lock:
+            self.entries[path] = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'result': result}
+        return result
+
+    def project(self, project_path):
+        """Combine a project's checklists
+
+        Returns (checklist paths, done, todo, newest Last modified date,
+        sections). With more than one checklist, section titles are prefixed
+        with the file name.
+        """
+        found = find_checklists(project_path)
+        done = todo = last_modified = 0
+        sections = []
+        for path, st in found:
+            try:
+                result = self.get(path, st)
+            except OSError:
+                continue
+            done += result['done']
+            todo += result['todo']
+            last_modified = max(last_modified, result['last_modified'])
+            prefix = f"{os.path.basename(path)}: " if len(found) > 1 else ''
+            sections.extend({**section, 'title': prefix + section['title']} for section in result['sections'])
+        return [path for path, _ in found], done, todo, last_modified, sections
@@ -1,8 +1,16 @@
+"""
+Dashboard configuration, loaded from config.toml on first use.
+
+get_config() parses the file and builds the DashboardConfig model once per
+process. Project discovery (the folders inside each project group) is kept
+in .cache/discovery.json and reused until config.toml or one of the project
+folders changes, so get_project_paths() answers without walking the groups
+or importing pydantic.
+"""
+
 import os
-import sys
+from functools import lru_cache
 from pathlib import Path
-from pydantic import BaseModel
-from typing import List, Optional
 
 # Try to import tomllib (Python 3.11+) or toml (older versions)
 try:
@@ -13,89 +21,135 @@ except ImportError:
     except ImportError:
         raise ImportError("Either 'tomllib' (Python 3.11+) or 'toml' package is required")
 
-# Import the models
-from models import EmailAccount, WeatherConfig, DashboardConfig
+from cache import load_json, save_json
 
 # Get the directory containing this config.py file
 config_dir = Path(__file__).parent
+# DASHBOARD_CONFIG points at another config file, e.g. for the benchmarks
+config_file = Path(os.environ.get('DASHBOARD_CONFIG', config_dir / "config.toml"))
 
-# Try to load config.toml
-config_file = config_dir / "config.toml"
-if config_file.exists():
-    with open(config_file, "rb") as f:
-        config_data = tomllib.load(f)
-else:
-    # Fallback to environment variables if config.toml doesn't exist
-    config_data = {}
+DISCOVERY_CACHE_FILE = "discovery.json"
+
+@lru_cache(maxsize=None)
+def load_config_data():
+    """Parse config.toml (once per process)"""
+    if config_file.exists():
+        with open(config_file, "rb") as f:
+            config_data = tomllib.load(f)
+    else:
+        # Fallback to environment variables if config.toml doesn't exist
+        config_data = {}
 
-# Create the DashboardConfig model from the loaded data
-try:
     # Handle the case where email might be a single dict or a list
-    if 'email' in config_data:
-        email_data = config_data['email']
-        if isinstance(email_data, dict):
-            # Convert single email to list
-            config_data['email'] = [email_data]
-
-    # weather configuration
-    weather_config = WeatherConfig(**config_data['weather'])
-
-    # email accounts
-    accounts = []
-    for acct in config_data["email"]:
-        accounts.append(EmailAccount(**acct))
-
-    # project listings
-    config_projects = config_data['projects']
+    if isinstance(config_data.get('email'), dict):
+        config_data['email'] = [config_data['email']]
+    return config_data
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def _discover(project_roots, project_groups):
     project_paths = set()
 
     # Keep track of project group paths to exclude them later
     project_group_paths = set()
-    
-    for p in config_projects['project_roots']:
+
+    for p in project_roots:
         current = Path(p).resolve()
         if current.exists() and current.is_dir():
             project_paths.add(current)
 
-    for p in config_projects['project_groups']:
+    for p in project_groups:
         current = Path(p)
         if current.exists() and current.is_dir():
             project_group_paths.add(current.resolve())
             for c in current.iterdir():
                 if c.is_dir() and not c.name.startswith('.'):
                     project_paths.add(c.resolve())
-    
-    # Remove project group directories from the final project list
-    # This ensures that directories that are project groups themselves are not included
-    final_project_paths = set()
-    for project_path in project_paths:
-        # Check if this path is a project group directory
-        is_project_group = False
-        for group_path in project_group_paths:
-            if project_path == group_path:
-                is_project_group = True
-                break
-        
-        if not is_project_group:
-            final_project_paths.add(project_path)
-    
-    project_list = list(final_project_paths)
-
-    # Create the full configuration model
-    dashboard_config = DashboardConfig(
-        weather = weather_config,
-        email = accounts,
-        projects = project_list
-    )
-    
-    # Extract individual components
-    EMAIL_ACCOUNTS = dashboard_config.email
-    WEATHER_CONFIG = dashboard_config.weather
-    PROJECTS = dashboard_config.projects
-    
-except Exception as e:
-    print(f"Error creating configuration model: {e}")
-    # Fallback to environment variables if model creation fails
-    EMAIL_ACCOUNTS = []
-    WEATHER_CONFIG = WeatherConfig(city="", lat=0.0, long=0.0, units="metric")
-    PROJECTS = []
+
+    # Directories that are project groups themselves are not projects
+    return sorted(project_paths - project_group_paths), sorted(project_group_paths)
+
+@lru_cache(maxsize=None)
+def discover_projects():
+    """Return (project paths, project group paths) from the [projects] section
+
+    The result is cached on disk, keyed on the config.toml mtime and the
+    mtimes of the project roots and groups (adding, removing or renaming a
+    project inside a group changes the group's mtime).
+    """
+    config_projects = load_config_data()['projects']
+    project_roots = [str(p) for p in config_projects['project_roots']]
+    project_groups = [str(p) for p in config_projects['project_groups']]
+    key = {
+        'config': _mtime_ns(config_file),
+        'roots': {p: _mtime_ns(p) for p in project_roots},
+        'groups': {p: _mtime_ns(p) for p in project_groups},
+    }
+
+    cached = load_json(DISCOVERY_CACHE_FILE)
+    if cached is not None and cached.get('key') == key:
+        return [Path(p) for p in cached['projects']], [Path(p) for p in cached['groups']]
+
+    projects, groups = _discover(project_roots, project_groups)
+    save_json(DISCOVERY_CACHE_FILE, {
+        'key': key,
+        'projects': [str(p) for p in projects],
+        'groups': [str(p) for p in groups],
+    })
+    return projects, groups
+
+def get_project_paths():
+    """Project folders to show on the dashboard"""
+    return discover_projects()[0]
+
+@lru_cache(maxsize=None)
+def get_config():
+    """Build the DashboardConfig model from config.toml (once per process)"""
+    # pydantic is only imported by the commands that need the full model
+    from models import (EmailAccount, WeatherConfig, ScanConfig, FetchConfig, TestsConfig,
+                        RefreshConfig, DaemonConfig, ServeConfig, PageConfig, ProfileConfig, HistoryConfig,
+                        DashboardConfig)
+
+    config_data = load_config_data()
+    try:
+        project_list, project_group_paths = discover_projects()
+
+        # Create the full configuration model
+        return DashboardConfig(
+            weather = WeatherConfig(**config_data['weather']),
+            email = [EmailAccount(**acct) for acct in config_data["email"]],
+            projects = project_list,
+            project_groups = project_group_paths,
+            scan = ScanConfig(**config_data.get('scan', {})),
+            fetch = FetchConfig(**config_data.get('fetch', {})),
+            tests = TestsConfig(**config_data.get('tests', {})),
+            refresh = RefreshConfig(**config_data.get('refresh', {})),
+            daemon = DaemonConfig(**config_data.get('daemon', {})),
+            serve = ServeConfig(**config_data.get('serve', {})),
+            page = PageConfig(**config_data.get('page', {})),
+            profile = ProfileConfig(**config_data.get('profile', {})),
+            history = HistoryConfig(**config_data.get('history', {}))
+        )
+    except Exception as e:
+        print(f"Error creating configuration model: {e}")
+        raise
+
+def __getattr__(name):
+    """Build the old module-level names (dashboard_config, PROJECTS, ...) on first access"""
+    if name == 'dashboard_config':
+        return get_config()
+    if name in ('EMAIL_ACCOUNTS', 'WEATHER_CONFIG', 'PROJECTS'):
+        try:
+            config = get_config()
+            return {'EMAIL_ACCOUNTS': config.email, 'WEATHER_CONFIG': config.weather,
+                    'PROJECTS': config.projects}[name]
+        except Exception:
+            # Fall back to empty values if the configuration can't be built
+            from models import WeatherConfig
+            return {'EMAIL_ACCOUNTS': [], 'PROJECTS': [],
+                    'WEATHER_CONFIG': WeatherConfig(city="", lat=0.0, long=0.0, units="metric")}[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
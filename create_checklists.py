@@ -3,9 +3,10 @@
 Script to create acceptance checklists for projects that don't have them.
 """
 
-import os
 import re
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import argparse
@@ -13,72 +14,111 @@ import argparse
 # Add the project root to the path so we can import config
 sys.path.insert(0, str(Path(__file__).parent))
 
-from config import dashboard_config
-from generate_dashboard import get_latest_mtime
+from config import get_config, get_project_paths
+from checklists import find_checklists
+from generate_dashboard import get_latest_mtime, get_scan_index
 
-def get_project_list():
-    """Get the list of projects from the dashboard configuration"""
-    projects = []
-    
-    # Process research projects
-    for item in dashboard_config.projects:
-        if not item.exists():
-            continue
+# Stands in for the date in the loaded template
+DATE_MARKER = "\0date\0"
+
+def load_template():
+    """Read the example checklist once, or return None if it is missing
 
-        # determine the most recent modification date for the project directory
-        last_updated = get_latest_mtime(item)
-        projects.append({
-            'name': item.name,
-            'project_path': item.resolve().absolute(),
-            'path': item.resolve().absolute(),
-            'last_modified': last_updated
-        })
+    The "Last modified:" date is replaced with a marker, so each project only
+    needs plain string replacements.
+    """
+    example_path = Path(__file__).parent / "docs" / "acceptance_checklist.example.md"
     
-    # Sort projects by last modified time (most recent first)
-    projects.sort(key=lambda x: x['last_modified'] or 0, reverse=True)
+    if not example_path.exists():
+        print(f"Example checklist not found at {example_path}")
+        return None
     
-    return projects
+    with open(example_path, 'r') as f:
+        example_content = f.read()
+    
+    # Format: Last modified: YYYY-MM-DD
+    return re.sub(r'Last modified: \d{4}-\d{2}-\d{2}', f'Last modified: {DATE_MARKER}', example_content)
 
-def create_acceptance_checklist(project_path, last_modified_date):
-    """Create an acceptance checklist for a project if it doesn't exist"""
+def render_checklist(template, project_name, last_modified_date):
+    """Fill in the project name and last modified date"""
+    return (template.replace('[Project Name]', project_name)
+            .replace(DATE_MARKER, last_modified_date.strftime("%Y-%m-%d")))
+
+def create_acceptance_checklist(project_path, last_modified_date, template=None, dry_run=False):
+    """Create an acceptance checklist for a project if it doesn't have one"""
     docs_dir = project_path / "docs"
     checklist_path = docs_dir / "acceptance_checklist.md"
     
-    # Check if checklist already exists
-    if checklist_path.exists():
+    # Check if any checklist already exists
+    if find_checklists(project_path):
         print(f"Checklist already exists for {project_path.name}")
         return False
 
+    if template is None:
+        template = load_template()
+        if template is None:
+            return False
+    content = render_checklist(template, project_path.name, last_modified_date)
+    
+    if dry_run:
+        print(f"Would create {checklist_path}")
+        return True
+
     # Create docs directory if it doesn't exist
     docs_dir.mkdir(parents=True, exist_ok=True)
     
-    # Read the example checklist
-    example_path = Path(__file__).parent / "docs" / "acceptance_checklist.example.md"
+    # Write the new checklist ('x' never overwrites one created in the meantime)
+    with open(checklist_path, 'x') as f:
+        f.write(content)
     
-    if not example_path.exists():
-        print(f"Example checklist not found at {example_path}")
-        return False
+    print(f"Created checklist for {project_path.name}")
+    return True
+
+def create_all_checklists(dry_run=False):
+    """Create checklists for every configured project that has none, returning the number created
+
+    Projects that already have a checklist are skipped with a single stat.
+    The date for the others comes from the dashboard's last scan when that is
+    recent ([refresh] projects), otherwise the project is scanned; projects
+    are handled in parallel.
+    """
+    started = time.perf_counter()
+    template = load_template()
+    if template is None:
+        return 0
     
-    # Read the example content
-    with open(example_path, 'r') as f:
-        example_content = f.read()
+    projects = [item for item in get_project_paths() if item.exists()]
+    if not projects:
+        print("No projects found.")
+        return 0
     
-    # Replace the project name in the example content
-    updated_content = example_content.replace('[Project Name]', project_path.name)
+    missing = [item for item in projects if not find_checklists(item)]
+    max_age = get_config().refresh.projects
     
-    # Replace the last modified date with the actual date
-    # Format: Last modified: YYYY-MM-DD
-    formatted_date = last_modified_date.strftime("%Y-%m-%d")
-    updated_content = re.sub(r'Last modified: \d{4}-\d{2}-\d{2}', f'Last modified: {formatted_date}', updated_content)
+    def process(project_path):
+        last_modified = get_latest_mtime(project_path, max_age=max_age)
+        return create_acceptance_checklist(project_path, datetime.fromtimestamp(last_modified),
+                                           template=template, dry_run=dry_run)
     
-    # Write the new checklist
-    with open(checklist_path, 'w') as f:
-        f.write(updated_content)
+    def process_safely(project_path):
+        try:
+            return process(project_path)
+        except Exception as e:
+            print(f"Error processing {project_path.name}: {e}")
+            return None
     
-    print(f"Created checklist for {project_path.name}")
-    return True
+    workers = max(1, min(get_config().scan.workers, len(missing) or 1))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(process_safely, missing))
+    
+    created = results.count(True)
+    failed = results.count(None)
+    print(f"\n{'Would create' if dry_run else 'Created'} {created} checklists "
+          f"({len(projects) - len(missing)} of {len(projects)} projects already have one"
+          f"{f', {failed} failed' if failed else ''}) in {time.perf_counter() - started:.2f}s")
+    return created
 
-def main(project_path=None, process_all=False):
+def main(project_path=None, process_all=False, dry_run=False):
     """Main function to process projects"""
     if project_path:
         # Process a specific project
@@ -91,35 +131,15 @@ def main(project_path=None, process_all=False):
         last_modified_date = datetime.fromtimestamp(get_latest_mtime(project_path))
         
         try:
-            if create_acceptance_checklist(project_path, last_modified_date):
-                print(f"Created checklist for {project_path.name}")
-            else:
-                print(f"No checklist created for {project_path.name}")
+            # create_acceptance_checklist() reports what it created (or would create)
+            if not create_acceptance_checklist(project_path, last_modified_date, dry_run=dry_run):
+                print(f"No checklist {'would be ' if dry_run else ''}created for {project_path.name}")
         except Exception as e:
             print(f"Error processing {project_path.name}: {e}")
     elif process_all:
         # Process all projects
         print("Scanning all projects for missing acceptance checklists...")
-        
-        projects = get_project_list()
-        
-        if not projects:
-            print("No projects found.")
-            return
-        
-        created_count = 0
-        
-        for project in projects:
-            project_path = project['path']
-            last_modified_date = datetime.fromtimestamp(project['last_modified'])
-            
-            try:
-                if create_acceptance_checklist(project_path, last_modified_date):
-                    created_count += 1
-            except Exception as e:
-                print(f"Error processing {project_path.name}: {e}")
-        
-        print(f"\nCreated {created_count} checklists.")
+        create_all_checklists(dry_run=dry_run)
     else:
         # Default behavior: process the current directory
         current_dir = Path('.').resolve()
@@ -129,10 +149,9 @@ def main(project_path=None, process_all=False):
         last_modified_date = datetime.fromtimestamp(get_latest_mtime(current_dir))
         
         try:
-            if create_acceptance_checklist(current_dir, last_modified_date):
-                print(f"Created checklist for {current_dir.name}")
-            else:
-                print(f"No checklist created for {current_dir.name}")
+            # create_acceptance_checklist() reports what it created (or would create)
+            if not create_acceptance_checklist(current_dir, last_modified_date, dry_run=dry_run):
+                print(f"No checklist {'would be ' if dry_run else ''}created for {current_dir.name}")
         except Exception as e:
             print(f"Error processing {current_dir.name}: {e}")
 
@@ -140,7 +159,9 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Create acceptance checklists for projects')
     parser.add_argument('project_path', nargs='?', help='Specific project path to process (default: current directory)')
     parser.add_argument('--all', action='store_true', help='Process all projects')
+    parser.add_argument('--dry-run', action='store_true', help='Show which checklists would be created without writing them')
     
     args = parser.parse_args()
     
-    main(project_path=args.project_path, process_all=args.all)
+    main(project_path=args.project_path, process_all=args.all, dry_run=args.dry_run)
+    get_scan_index().save()
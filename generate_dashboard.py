@@ -1,16 +1,34 @@
 import os
-import re
-import subprocess
+import hashlib
+import threading
+import time
+import fcntl
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import json
-import imaplib
-import email
 from datetime import datetime
-import requests
-from jinja2 import Environment, FileSystemLoader
-from config import dashboard_config
+from config import get_config, get_project_paths
+from cache import CACHE_DIR
+from scan_index import ScanIndex
+from git_meta import GitMetaReader
+from progress import ProgressCache, AcceptanceRunner
+from checklists import ChecklistIndex
+from walker import IgnoreRules
+from watcher import Inotify, ProjectWatcher
+from scheduler import DUE_SLACK, Source, SourceState
+from output import OutputWriter, minify_css
+from icons import icon, icon_sprite, referenced_icons
+import profiling
+from profiling import span, profiled
 import argparse
 
+# Folder the dashboard is written to (DASHBOARD_DIST_DIR moves it, e.g. for the benchmarks)
+DIST_DIR = Path(os.environ.get('DASHBOARD_DIST_DIR', Path(__file__).parent / 'dist'))
+
+# pydantic (models), requests (weather), imaplib (mail), jinja2 and http.server
+# are imported where they are used, so quick commands like --list-projects and
+# create_checklists.py start without loading them
+
 def get_projects_by_activity(base_path):
     project_list = []
     base = Path(base_path)
@@ -18,23 +36,12 @@ def get_projects_by_activity(base_path):
     # Iterate through each item in the projects folder
     for entry in base.iterdir():
         if entry.is_dir():
-            latest_mtime = 0
-            
-            # Deep dive into the project to find the newest file
-            for root, _, files in os.walk(entry):
-                for f in files:
-                    try:
-                        file_path = os.path.join(root, f)
-                        mtime = os.path.getmtime(file_path)
-                        if mtime > latest_mtime:
-                            latest_mtime = mtime
-                    except (OSError, PermissionError):
-                        continue
-            
-            # If the folder is empty, use the folder's own mtime
-            if latest_mtime == 0:
-                latest_mtime = entry.stat().st_mtime
-                
+            # Find the newest file, pruning hidden and ignored folders
+            try:
+                latest_mtime = get_latest_mtime(entry)
+            except OSError:
+                continue
+
             project_list.append({
                 'name': entry.name,
                 'path': entry,
@@ -45,320 +52,575 @@ def get_projects_by_activity(base_path):
     project_list.sort(key=lambda x: x['last_mod'], reverse=True)
     return project_list
 
-def get_project_last_modified_date(project_path, ignore=None):
-    """Determine the last modified date for a project using multiple methods"""
-    max_date = 0
-    checklist_path = project_path / "docs/acceptance_checklist.md"
-    
-    # 1. Check for git repository and get most recent commit date
-    git_path = project_path / ".git"
-    if git_path.exists():
-        try:
-            # Get the most recent commit date
-            result = subprocess.run(
-                ["git", "log", "-1", "--format=%ct"],
-                cwd=project_path,
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                commit_timestamp = int(result.stdout.strip())
-                max_date = max(max_date, commit_timestamp)
-        except Exception:
-            pass
-    
-    # 2. Find the max modified time of project files
+_checklist_index = None
+_checklist_index_lock = threading.Lock()
+
+def get_checklist_index():
+    """Return the checklist index, loading it on first use"""
+    global _checklist_index
+    with _checklist_index_lock:
+        if _checklist_index is None:
+            _checklist_index = ChecklistIndex.load()
+    return _checklist_index
+
+_git_reader = None
+_git_reader_lock = threading.Lock()
+
+def get_git_reader():
+    """Return the shared git metadata reader, loading its cache on first use"""
+    global _git_reader
+    with _git_reader_lock:
+        if _git_reader is None:
+            _git_reader = GitMetaReader.load()
+    return _git_reader
+
+def get_git_info(project_path, tree_key=None):
+    """Return the latest commit time, branch and dirty flag, or None if not a git repo
+
+    tree_key (the project's newest file mtime) lets an unchanged dirty flag be reused.
+    """
     try:
-        file_mtime = get_latest_mtime(project_path, ignore=checklist_path.resolve())
-        max_date = max(max_date, file_mtime)
+        return get_git_reader().read(project_path, tree_key=tree_key)
     except Exception:
-        pass
-    
-    # 3. Check acceptance_checklist.md for last modified date
-    if checklist_path.exists():
-        try:
-            with open(checklist_path, 'r') as f:
-                content = f.read()
-            
-            # Look for the Last modified line
-            last_modified_match = re.search(r'Last modified:\s*(\d{4}-\d{2}-\d{2})', content)
-            
-            if last_modified_match:
-                last_modified_str = last_modified_match.group(1)
-                checklist_date = datetime.strptime(last_modified_str, '%Y-%m-%d')
-                checklist_timestamp = checklist_date.timestamp()
-                max_date = max(max_date, checklist_timestamp)
-        except Exception:
-            pass
-    
-    return max_date
+        return None
 
-def get_progress(project_path):
-    """Calculate project progress based on multiple methods"""
-    # 1. Tier 1: Python Acceptance Tests
-    test_file = project_path / "tests/acceptance.py"
-    if test_file.exists():
-        try:
-            # Run pytest quietly, just collecting results
-            # We use --collect-only first to see total tests, then run to see passes
-            result = subprocess.run(
-                ["pytest", test_file, "--json-report"], # Requires pytest-json-report plugin
-                capture_output=True, text=True
+_progress_cache = None
+_progress_cache_lock = threading.Lock()
+_acceptance_runner = None
+
+def get_progress_cache():
+    """Return the acceptance test result cache, loading it on first use"""
+    global _progress_cache
+    with _progress_cache_lock:
+        if _progress_cache is None:
+            _progress_cache = ProgressCache.load()
+    return _progress_cache
+
+def get_acceptance_runner():
+    """Return the shared executor that bounds concurrent acceptance test runs"""
+    global _acceptance_runner
+    with _progress_cache_lock:
+        if _acceptance_runner is None:
+            tests = get_config().tests
+            _acceptance_runner = AcceptanceRunner(
+                max_concurrency=tests.max_concurrency,
+                timeout=tests.timeout,
+                cpu_seconds=tests.cpu_seconds,
+                memory_mb=tests.memory_mb
             )
-            
-            # Simple fallback if you don't want plugins: Check exit code & output
-            # 0 = all pass, 1 = some fail, 5 = no tests found
-            process = subprocess.run(["pytest", "-q", "--tb=no", test_file], capture_output=True, text=True)
-            output = process.stdout
-            
-            # Extract "5 passed, 2 failed" style strings
-            passed = re.search(r'(\d+) passed', output)
-            failed = re.search(r'(\d+) failed', output)
-            
-            p_count = int(passed.group(1)) if passed else 0
-            f_count = int(failed.group(1)) if failed else 0
-            
-            if (p_count + f_count) > 0:
-                return round((p_count / (p_count + f_count)) * 100, 2)
-        except Exception:
-            pass # Fall back to next tier if pytest fails
+    return _acceptance_runner
 
-    # 2. Tier 2: Markdown Checklist
-    checklist_path = project_path / "docs/planning/acceptance.md"
-    if not checklist_path.exists():
-        checklist_path = project_path / "docs/acceptance_checklist.md"
+def get_test_progress(project_path):
+    """Tier 1 progress: percentage of passing acceptance tests, TIMED_OUT or None"""
+    if not get_config().tests.enabled:
+        return None
+    try:
+        rules = IgnoreRules.for_project(project_path, get_config().scan.ignore)
+        return get_progress_cache().get_progress(project_path, get_acceptance_runner(), rules=rules)
+    except Exception:
+        return None # Fall back to the checklist if pytest fails
 
-    if checklist_path.exists():
-        try:
-            with open(checklist_path, 'r') as f:
-                content = f.read()
-                done = len(re.findall(r'\[x\]', content, re.IGNORECASE))
-                todo = len(re.findall(r'\[ \]', content, re.IGNORECASE))
-                avg = round((done / (done + todo)) * 100, 2) if done + todo > 0 else 0
-                print(f'>> checklist_path: {str(checklist_path)} : avg: {avg}')
-                if (done + todo) > 0:
-                    return avg
-        except Exception:
-            pass
-
-    # 3. Tier 3: Unknown
-    return "Unknown"
+# Snapshots built during the current run, keyed by project path
+_snapshots = {}
+
+def get_project_snapshot(project_path):
+    """Build (or reuse from this run) the snapshot for a project
+
+    Each project gets one tree walk, one git query and a stat of each
+    checklist (read only when it changed); status, progress and last
+    modified date are all derived from the result.
+    """
+    from models import ProjectSnapshot
+
+    project_path = Path(project_path)
+    snapshot = _snapshots.get(project_path)
+    if snapshot is not None:
+        return snapshot
+
+    with span('project', project_path.name):
+        with span('checklist'):
+            try:
+                checklist_paths, done, todo, checklist_date, sections = get_checklist_index().project(project_path)
+            except Exception:
+                checklist_paths, done, todo, checklist_date, sections = [], 0, 0, 0, []
+
+        # Ignore the checklists themselves when calculating file modification times,
+        # since checklists are often bulk updated
+        with span('scan'):
+            try:
+                files_mtime = get_latest_mtime(project_path, ignore=checklist_paths)
+            except Exception:
+                files_mtime = 0
+
+        with span('git'):
+            git_info = get_git_info(project_path, tree_key=files_mtime) or {}
+
+        with span('tests'):
+            test_progress = get_test_progress(project_path)
+
+    snapshot = ProjectSnapshot(
+        name=project_path.name,
+        path=project_path,
+        commit_time=git_info.get('commit_time', 0),
+        branch=git_info.get('branch'),
+        dirty=git_info.get('dirty'),
+        files_mtime=files_mtime,
+        checklist_paths=checklist_paths,
+        checklist_done=done,
+        checklist_todo=todo,
+        checklist_date=checklist_date,
+        checklist_sections=sections,
+        test_progress=test_progress,
+    )
+    _snapshots[project_path] = snapshot
+    return snapshot
+
+def get_project_last_modified_date(project_path):
+    """Determine the last modified date for a project using multiple methods"""
+    return get_project_snapshot(project_path).last_modified
+
+def get_progress(project_path):
+    """Calculate project progress based on multiple methods"""
+    return get_project_snapshot(project_path).progress
 
 def get_project_status(project_path):
     """Determine project status based on last modified date using multiple methods"""
-    # Get the last modified date using the new method that checks multiple sources
-    last_modified_timestamp = get_project_last_modified_date(project_path)
-    
-    if last_modified_timestamp == 0:
-        return "Unknown"
-    
-    # Convert timestamp to datetime for comparison
-    last_modified_date = datetime.fromtimestamp(last_modified_timestamp)
-    current_date = datetime.now()
-    days_diff = (current_date - last_modified_date).days
-
-    if days_diff < 30:
-        return "Active"
-    elif days_diff < 180:
-        return "Dormant"
-    elif days_diff < 365:
-        return "Stale"
-    else:
-        return "Abandoned"
+    return get_project_snapshot(project_path).status
 
-def get_email_counts():
-    """Fetch email counts from multiple mailboxes across all email accounts"""
-    email_counts = []
+_imap_pool = None
+
+_mailbox_sync = None
+
+def get_imap_pool():
+    """Return the shared IMAP connection pool"""
+    global _imap_pool
+    if _imap_pool is None:
+        from mail import ImapPool
+        _imap_pool = ImapPool(timeout=get_config().fetch.timeout)
+    return _imap_pool
+
+def get_mailbox_sync():
+    """Return the unread preview cache, loading it on first use"""
+    global _mailbox_sync
+    if _mailbox_sync is None:
+        from mail import MailboxSync
+        _mailbox_sync = MailboxSync.load()
+    return _mailbox_sync
+
+def get_account_counts(account):
+    """Fetch unread counts (and previews, if enabled) for every mailbox of one email account"""
+    from mail import count_unseen
+
+    # Get mailbox user from email address
+    mailbox_user = account.user.split('@')[0] if '@' in account.user else account.user
+    
+    def fetch(conn):
+        results = []
+        for mailbox in account.mailboxes:
+            if account.previews:
+                results.append(get_mailbox_sync().sync(conn, account, mailbox, account.previews))
+            else:
+                results.append((count_unseen(conn, mailbox), []))
+        return results
     
     try:
-        # Iterate through all email accounts
-        for account in dashboard_config.email:
-            # Connect to the email server
-            mail = imaplib.IMAP4_SSL(account.host)
-            mail.login(account.user, account.password)
-            
-            for mailbox in account.mailboxes:
-                # Select mailbox
-                mail.select(mailbox)
-                
-                # Search for unread emails
-                status, messages = mail.search(None, 'UNSEEN')
-                email_ids = messages[0].split()
-                
-                # Get mailbox user from email address
-                mailbox_user = account.user.split('@')[0] if '@' in account.user else account.user
-                
-                email_counts.append({
-                    'mailbox': mailbox_user,
-                    'count': len(email_ids)
-                })
-            
-            mail.close()
-            mail.logout()
-        
+        with span('imap', account.name):
+            results = get_imap_pool().run(account, fetch)
     except Exception as e:
-        print(f"Error fetching email counts: {e}")
-        # Return default values if error occurs
-        if dashboard_config.email:
-            for account in dashboard_config.email:
-                for mailbox in account.mailboxes:
-                    # Get mailbox user from email address
-                    mailbox_user = account.user.split('@')[0] if '@' in account.user else account.user
-                    email_counts.append({
-                        'mailbox': mailbox_user,
-                        'count': 0
-                    })
-        else:
-            # Fallback to environment variables if no account
-            mailbox_user = os.getenv('EMAIL_USER', '').split('@')[0] if '@' in os.getenv('EMAIL_USER', '') else os.getenv('EMAIL_USER', '')
-            email_counts.append({
-                'mailbox': mailbox_user,
-                'count': 0
-            })
+        print(f"Error fetching email counts for {account}: {e}")
+        # Only this account falls back to zero counts
+        results = [(0, [])] * len(account.mailboxes)
     
-    return email_counts
+    return [
+        {'mailbox': mailbox_user, 'folder': mailbox, 'count': count, 'previews': previews}
+        for mailbox, (count, previews) in zip(account.mailboxes, results)
+    ]
+
+def get_email_counts():
+    """Fetch email counts from multiple mailboxes across all email accounts"""
+    accounts = get_config().email
+    if not accounts:
+        return []
+    
+    get_imap_pool()
+    get_mailbox_sync()
+    # Query all accounts at once, each on its own pooled connection
+    with ThreadPoolExecutor(max_workers=len(accounts)) as executor:
+        results = list(executor.map(get_account_counts, accounts))
+    get_mailbox_sync().save()
+    
+    return [email_count for account_counts in results for email_count in account_counts]
+
+_weather_client = None
+
+def get_weather_client(background=False):
+    """Return the shared weather client, loading its cache on first use
+
+    With background, aging readings are refreshed in the background (for the
+    daemon, which renders again later); the first call decides.
+    """
+    global _weather_client
+    if _weather_client is None:
+        from weather import WeatherClient
+        _weather_client = WeatherClient(
+            api_url=get_config().weather.api_url,
+            ttl=get_config().weather.cache_ttl,
+            timeout=get_config().fetch.timeout,
+            background=background
+        )
+    return _weather_client
 
 def get_weather():
     """Fetch weather data from Open-Meteo API"""
+    from models import WeatherResponse
+    from weather import HOURLY_FIELDS, summarize_forecast
+
+    # Get coordinates for the city (this is a simplified approach)
+    # For a more robust solution, you'd want to use a geocoding API
+    is_metric = get_config().weather.units == 'metric'
+    params = {
+        'latitude': get_config().weather.lat,
+        'longitude': get_config().weather.long,
+        'current': 'temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code',
+        'temperature_unit': 'celsius' if is_metric else 'fahrenheit',
+        'wind_speed_unit': 'kmh' if is_metric else 'mph',
+        'precipitation_unit': 'mm' if is_metric else 'inch'
+    }
+    if get_config().weather.forecast:
+        params.update({
+            'hourly': HOURLY_FIELDS,
+            'forecast_days': get_config().weather.forecast_days,
+            'timezone': 'auto'
+        })
+    
     try:
-        # Open-Meteo API endpoint for current weather
-        url = "https://api.open-meteo.com/v1/forecast"
-        
-        # Get coordinates for the city (this is a simplified approach)
-        # For a more robust solution, you'd want to use a geocoding API
-        is_metric = dashboard_config.weather.units == 'metric'
-        params = {
-            'latitude': dashboard_config.weather.lat,  # London latitude
-            'longitude': dashboard_config.weather.long,  # London longitude
-            'current': 'temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code',
-            'temperature_unit': 'celsius' if is_metric else 'fahrenheit',
-            'wind_speed_unit': 'kmh' if is_metric else 'mph',
-            'precipitation_unit': 'mm' if is_metric else 'inch'
-        }
-        
-        response = requests.get(url, params=params)
-        data = response.json()
-        
-        # Extract weather information
-        current = data.get('current', {})
-        
-        # Create WeatherResponse model instance
-        weather_response = {
-            'code': current.get('weather_code', 0),
-            'city': dashboard_config.weather.city,
-            'temperature': round(current.get('temperature_2m', 0)),
-            'humidity': current.get('relative_humidity_2m', 0),
-            'wind_speed': current.get('wind_speed_10m', 0)
-        }
-        
-        # Use the model to compute derived fields
-        from models import WeatherResponse
-        weather_model = WeatherResponse(**weather_response)
-        
-        return weather_model
-            
+        # A refresh the scheduler considers due gets a new reading, even if the
+        # cached one is still within the client's TTL
+        max_age = get_config().refresh.weather * (1 - DUE_SLACK)
+        data, fetched_at, stale = get_weather_client().get(params, max_age=max_age)
     except Exception as e:
         print(f"Error fetching weather data: {e}")
         # Return a default WeatherResponse model
-        from models import WeatherResponse
         return WeatherResponse(
             code=0,
-            city=dashboard_config.weather.city,
+            city=get_config().weather.city,
             temperature=0,
             humidity=0,
             wind_speed=0,
             description="Error fetching data"
         )
+    
+    # Extract weather information
+    current = data.get('current', {})
+    
+    forecast = {}
+    if get_config().weather.forecast:
+        try:
+            forecast = summarize_forecast(data)
+        except ImportError:
+            print("Weather forecast summary requires numpy (pip install numpy)")
+        except Exception as e:
+            print(f"Error summarizing weather forecast: {e}")
+    
+    # The model computes the derived fields
+    return WeatherResponse(
+        **forecast,
+        code=current.get('weather_code', 0),
+        city=get_config().weather.city,
+        temperature=round(current.get('temperature_2m', 0)),
+        humidity=current.get('relative_humidity_2m', 0),
+        wind_speed=current.get('wind_speed_10m', 0),
+        fetched_at=fetched_at,
+        stale=stale
+    )
+
+def get_project_info(item):
+    """Collect the dashboard record for a single project"""
+    from models import ProjectRecord
+
+    snapshot = get_project_snapshot(item)
+    # Only the compact record is kept
+    _snapshots.pop(Path(item), None)
+    
+    # Convert timestamp to datetime for display
+    last_modified_datetime = datetime.fromtimestamp(snapshot.last_modified)
+    
+    return ProjectRecord(
+        name=snapshot.name,
+        path=item.resolve().absolute(),
+        status=snapshot.status,
+        progress=snapshot.progress,
+        branch=snapshot.branch,
+        dirty=snapshot.dirty,
+        last_modified=snapshot.last_modified,
+        last_modified_string=last_modified_datetime.strftime('%Y-%m-%d %H:%M'),
+        sections=tuple(snapshot.checklist_sections)
+    )
+
+def iter_project_records(items):
+    """Yield a record for each project folder, in the order given
+
+    Projects are mostly waiting on subprocesses and disk, so they are
+    collected concurrently.
+    """
+    workers = max(1, min(get_config().scan.workers, len(items) or 1))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(profiled(get_project_info), items)
 
 def get_projects_from_directory():
     """Read projects from ~/Projects directory structure"""
-    projects = []
+    items = [item for item in get_config().projects if item.exists()]
     
-    # Process research projects
-    for item in dashboard_config.projects:
-        if not item.exists():
-            continue
-
-        
-        # Calculate progress
-        progress = get_progress(item)
-        
-        # Determine project status based on acceptance checklist
-        status = get_project_status(item)
-        
-        # Get the last modified date using the new method
-        # Ignore the acceptance checklist file when calculating file modification times
-        checklist_path = item / "docs/acceptance_checklist.md"
-        ignore_paths = [str(checklist_path)] if checklist_path.exists() else []
-        
-        last_modified_timestamp = get_project_last_modified_date(item, ignore=ignore_paths)
-        
-        # Convert timestamp to datetime for display
-        last_modified_datetime = datetime.fromtimestamp(last_modified_timestamp)
-        
-        projects.append({
-            'name': item.name,
-            'project_path': item.resolve().absolute(),
-            'status': status,
-            'progress': progress,
-            'path': item.resolve().absolute(),
-            'last_modified': last_modified_timestamp,
-            'last_modified_string': last_modified_datetime.strftime('%Y-%m-%d %H:%M')
-        })
+    # Start each run with fresh snapshots
+    _snapshots.clear()
     
     # Sort projects by last modified time (most recent first)
     # Handle None values by sorting them last
-    projects.sort(key=lambda x: x['last_modified'] or 0, reverse=True)
-    
-    return projects
+    return sorted(iter_project_records(items), key=lambda x: x.last_modified or 0, reverse=True)
 
-def get_latest_mtime(project_path, ignore=None):
-    # Get the mtime of the folder itself as a starting point
-    max_mtime = project_path.stat().st_mtime
-    
-    # If ignore is a string, convert to list
-    if isinstance(ignore, str):
+_scan_index = None
+_scan_index_lock = threading.Lock()
+
+def get_scan_index():
+    """Return the persistent scan index, loading it on first use"""
+    global _scan_index
+    with _scan_index_lock:
+        if _scan_index is None:
+            _scan_index = ScanIndex.load(full_rescan_hours=get_config().scan.full_rescan_hours)
+    return _scan_index
+
+def get_latest_mtime(project_path, ignore=None, max_age=None):
+    """Find the newest mtime in a project, skipping folders unchanged since the last scan
+
+    With max_age, the result of the last scan is reused without touching the
+    disk if that scan is less than max_age seconds old.
+    """
+    # If ignore is a single path, convert to list
+    if ignore is None:
+        ignore = []
+    elif isinstance(ignore, (str, Path)):
         ignore = [ignore]
-    
-    # Recursively check all files
-    for file in project_path.rglob('*'):
-        # Skip hidden files/folders (like .git, .venv, or __pycache__)
-        if any(part.startswith('.') for part in file.parts):
-            continue
-            
-        # Skip ignored paths
-        if ignore:
-            file_path_str = str(file)
-            if file_path_str in ignore:
-                continue
-                
-        try:
-            mtime = file.stat().st_mtime
-            if mtime > max_mtime:
-                max_mtime = mtime
-        except OSError:
-            # Handle cases where files might be deleted/locked during scan
-            continue
-            
-    return max_mtime
 
-def generate_dashboard():
-    """Generate the HTML dashboard"""
-    
-    # Create dist folder if it doesn't exist
-    dist_folder = Path(__file__).parent / 'dist'
-    dist_folder.mkdir(parents=True, exist_ok=True)
-    
-    # Copy styles.css to dist folder
+    # Hidden folders, the project's .gitignore and the global ignore list are pruned
+    rules = IgnoreRules.for_project(project_path, get_config().scan.ignore)
+    if max_age is not None:
+        cached = get_scan_index().cached_latest_mtime(project_path, max_age, ignore=ignore, rules=rules)
+        if cached is not None:
+            return cached
+    return get_scan_index().latest_mtime(project_path, ignore=ignore, rules=rules)
+
+def collect_projects():
+    """Collect all projects and persist the scan index they were built from
+
+    The caches are saved even if collecting fails part way, so the work
+    already done is kept for the next run.
+    """
+    try:
+        return get_projects_from_directory()
+    finally:
+        get_scan_index().save()
+        get_progress_cache().save()
+        get_checklist_index().save()
+        git_reader = get_git_reader()
+        git_reader.save()
+        git_reader.close()
+
+HISTORY_FILE = "history.sqlite3"
+
+_history = None
+
+def get_history():
+    """Return the history store, or None when [history] is disabled"""
+    global _history
+    if _history is None and get_config().history.enabled:
+        from history import History
+        settings = get_config().history
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _history = History(CACHE_DIR / HISTORY_FILE, hourly_days=settings.hourly_days,
+                           daily_days=settings.daily_days, weekly_days=settings.weekly_days)
+    return _history
+
+def record_history(email_counts, projects):
+    """Add the current progress, status, last modified dates and unread counts to the history"""
+    from history import STATUS_LEVELS
+
+    samples = []
+    for project in projects:
+        name = str(project.path)
+        if isinstance(project.progress, (int, float)):
+            samples.append(('progress', name, project.progress))
+        if project.status in STATUS_LEVELS:
+            samples.append(('status', name, STATUS_LEVELS[project.status]))
+        if project.last_modified:
+            samples.append(('last_modified', name, project.last_modified))
+    for email_count in email_counts:
+        samples.append(('unread', f"{email_count['mailbox']}/{email_count['folder']}", email_count['count']))
+
+    try:
+        history = get_history()
+        if history is not None:
+            with span('history'):
+                history.record(samples)
+    except Exception as e:
+        print(f"Error recording history: {e}")
+
+def get_trends():
+    """Daily progress and unread counts for the sparklines, keyed by project path and mailbox/folder"""
+    trends = {'progress': {}, 'unread': {}}
+    try:
+        history = get_history()
+        if history is not None:
+            for kind in trends:
+                trends[kind] = history.daily(kind, get_config().history.sparkline_days)
+    except Exception as e:
+        print(f"Error reading history: {e}")
+    return trends
+
+def _dump_source(name, value):
+    """Convert a data source result into JSON-friendly values"""
+    if name == 'weather':
+        return value.model_dump()
+    if name == 'projects':
+        return [{**project._asdict(), 'path': str(project.path)} for project in value]
+    return value
+
+def _load_source(name, value):
+    """Rebuild a data source result saved by _dump_source"""
+    from models import WeatherResponse, ProjectRecord
+
+    if name == 'weather':
+        return WeatherResponse(**value)
+    if name == 'projects':
+        # Fields missing from older state files take their defaults
+        return [
+            ProjectRecord(**{field: project[field] for field in ProjectRecord._fields if field in project})
+            ._replace(path=Path(project['path']), sections=tuple(project.get('sections', ())))
+            for project in value
+        ]
+    return value
+
+def _default_source(name):
+    """Placeholder used when a source has neither a fresh nor a last known value"""
+    from models import WeatherResponse
+
+    if name == 'weather':
+        return WeatherResponse(
+            code=0,
+            city=get_config().weather.city,
+            temperature=0,
+            humidity=0,
+            wind_speed=0,
+            description="No data yet"
+        )
+    return []
+
+@profiled
+def _run_source(name, func, results):
+    try:
+        with span(name):
+            results[name] = func()
+    except Exception as e:
+        print(f"Error fetching {name}: {e}")
+
+def get_sources():
+    """The dashboard's data sources with their refresh intervals and relative costs"""
+    refresh = get_config().refresh
+    return [
+        Source('email', get_email_counts, refresh.email, cost=2),
+        Source('weather', get_weather, refresh.weather, cost=1),
+        Source('projects', collect_projects, refresh.projects, cost=10),
+    ]
+
+# Fetch threads still running after their deadline
+_late_threads = []
+
+def wait_for_late_sources():
+    """Wait for sources that missed the fetch deadline to finish and store their results
+
+    Their own timeouts (fetch.timeout, tests.timeout) bound the wait.
+    """
+    while _late_threads:
+        _late_threads.pop().join()
+
+def fetch_sources(sources, deadline, state, force=False):
+    """Refresh the sources that are due and return the current data of every source
+
+    Due sources run in their own threads, bounded by deadline seconds overall.
+    Sources that aren't due, fail or miss the deadline are filled in from
+    their stored state. A source that misses the deadline keeps running and
+    stores its result in state (and saves it) once it finishes, so the next
+    run has it; wait_for_late_sources() waits for those.
+    """
+    due = state.due(sources, force=force)
+    results = {}
+    late = set()
+    lock = threading.Lock()
+
+    def run(source):
+        _run_source(source.name, source.fetch, results)
+        with lock:
+            if source.name in late and source.name in results:
+                state.update(source.name, _dump_source(source.name, results[source.name]))
+                state.save()
+                print(f"{source.name} finished after the deadline, stored for the next run")
+
+    threads = []
+    for source in due:
+        thread = threading.Thread(target=run, args=(source,), name=f"fetch-{source.name}", daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    end = time.monotonic() + deadline
+    for thread in threads:
+        thread.join(max(0, end - time.monotonic()))
+
+    with lock:
+        finished = dict(results)
+        late.update(source.name for source, thread in zip(due, threads)
+                    if thread.is_alive() and source.name not in finished)
+    _late_threads[:] = [thread for thread in _late_threads + threads if thread.is_alive()]
+
+    due_names = {source.name for source in due}
+    data = {}
+    for source in sources:
+        name = source.name
+        stored = state.get(name)
+        if name in finished:
+            data[name] = finished[name]
+            state.update(name, _dump_source(name, results[name]))
+        elif stored is not None:
+            if name in due_names:
+                print(f"{name} missed the {deadline}s deadline, using last known value")
+            data[name] = _load_source(name, stored)
+        else:
+            print(f"{name} missed the {deadline}s deadline and has no last known value")
+            data[name] = _default_source(name)
+    return data
+
+def acquire_run_lock():
+    """Take an exclusive lock so overlapping cron runs don't pile up
+
+    Returns the open lock file (keep it referenced for the life of the run),
+    or None if another run already holds the lock.
+    """
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    lock_file = open(CACHE_DIR / "generate.lock", 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+def load_styles():
+    """Return styles.css (or the default styles), minified for inlining into the page"""
     styles_source = Path(__file__).parent / 'styles.css'
-    styles_dest = dist_folder / 'styles.css'
     
     if os.path.exists(styles_source):
         with open(styles_source, 'r') as f:
             styles_content = f.read()
         
-        with open(styles_dest, 'w') as f:
-            f.write(styles_content)
+        return minify_css(styles_content)
     else:
         # Create default styles if file doesn't exist
         default_styles = """body {
@@ -447,53 +709,385 @@ header {
     opacity: 0.8;
 }"""
         
-        with open(styles_dest, 'w') as f:
-            f.write(default_styles)
+        return minify_css(default_styles)
+
+def _render_key(email_counts, weather_data, projects):
+    """Fingerprint of the rendered data, to skip renders when nothing changed"""
+    # When the reading was taken only shows up as its age, and only while it is stale;
+    # the age is recomputed whenever the model is built, so it changes every minute
+    weather = weather_data.model_dump(exclude={'fetched_at'} if weather_data.stale else {'fetched_at', 'age'})
+    data = [email_counts, weather, projects]
+    digest = hashlib.sha256()
+    # Hashed as it is encoded, without building the whole JSON string
+    for chunk in json.JSONEncoder(sort_keys=True, default=str).iterencode(data):
+        digest.update(chunk.encode())
+    return digest.hexdigest()
+
+def _page_key(data_key, trends):
+    """Fingerprint of everything else the page is rendered from: the day, trends, templates, styles and config"""
+    base_dir = Path(__file__).parent
+    sources = sorted((base_dir / "templates").rglob('*.html')) + [base_dir / 'styles.css']
+    stamps = [(str(path), path.stat().st_mtime_ns) for path in sources if path.exists()]
+    data = [data_key, datetime.now().strftime("%Y-%m-%d"), trends, stamps, get_config().model_dump_json()]
+    return hashlib.sha256(json.dumps(data, default=str).encode()).hexdigest()
+
+_template_env = None
+
+def get_template_env():
+    """Return the Jinja environment, compiling templates once and caching their bytecode
+
+    Templates are still reloaded when they change on disk.
+    """
+    global _template_env
+    if _template_env is None:
+        from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape
+        from history import sparkline
+        template_dir = Path(__file__).parent / "templates"
+        bytecode_dir = CACHE_DIR / "jinja"
+        bytecode_dir.mkdir(parents=True, exist_ok=True)
+        _template_env = Environment(
+            loader=FileSystemLoader(template_dir.resolve()),
+            # Mail senders and subjects are arbitrary text from incoming mail
+            autoescape=select_autoescape(['html']),
+            # Cached bytecode is only keyed on the template source, so templates
+            # compiled before autoescaping was turned on must not be reused
+            bytecode_cache=FileSystemBytecodeCache(str(bytecode_dir), 'autoescape_%s.cache')
+        )
+        _template_env.globals['icon'] = icon
+        _template_env.globals['sparkline'] = sparkline
+    return _template_env
+
+# Cards that are rendered separately and can be refreshed on their own when served
+WIDGETS = ('weather', 'email', 'projects')
+
+# Columns of the project list chunks, in the order the page's script reads them
+CHUNK_FIELDS = ('name', 'path', 'status', 'progress', 'branch', 'dirty', 'last_modified_string')
+
+def project_chunks(projects, chunk_size):
+    """Yield the script bodies for the project list chunks, each passing a compact JSON table to the page
+
+    Scripts rather than JSON files, since a page opened from disk may load
+    scripts but not fetch() other files.
+    """
+    for index, start in enumerate(range(0, len(projects), chunk_size)):
+        rows = [[getattr(project, field) for field in CHUNK_FIELDS] for project in projects[start:start + chunk_size]]
+        table = json.dumps({'fields': CHUNK_FIELDS, 'rows': rows}, separators=(',', ':'), default=str)
+        yield f"dashboardProjects({index},{table});\n"
+
+@span('render')
+def render_dashboard(email_counts, weather_data, projects, server=None):
+    """Render the dashboard with the given data, returning the output path
+
+    The page is streamed to the file as it renders, cards included, so the
+    whole page is never held in memory, and isn't rendered at all if it was
+    already written from the same data. With a DashboardServer the cards and
+    page are rendered to strings instead, since they are kept in memory to be
+    served anyway, and the page, the project chunks and the per-widget JSON
+    are published to it.
+    """
+    from models import WEATHER_MAP
+
+    # Create dist folder if it doesn't exist
+    dist_folder = DIST_DIR
+    dist_folder.mkdir(parents=True, exist_ok=True)
+    output_path = dist_folder / 'dashboard.html'
     
-    # Get data
-    email_counts = get_email_counts()
-    weather_data = get_weather()
-    projects = get_projects_from_directory()
-    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    writer = OutputWriter.load()
+    
+    # "Last updated" is when the data last changed, so an unchanged page renders
+    # identically and isn't rewritten
+    data_key = _render_key(email_counts, weather_data, projects)
+    updated_at = writer.updated_at(output_path, data_key)
+    current_time = datetime.fromtimestamp(updated_at).strftime("%Y-%m-%d %H:%M:%S")
+    
+    # Precomputed daily aggregates, so this doesn't grow with the history
+    trends = get_trends()
+    
+    # A page still on disk as it was written from the same inputs would come
+    # out the same, so it isn't rendered again (unless it shows this run's timings)
+    page_key = _page_key(data_key, trends)
+    if server is None and not get_config().profile.footer and writer.is_current(output_path, page_key):
+        return output_path
+    
+    # Only the most recent projects are rendered into the page, so it stays small
+    # however many there are; the whole list is split into chunk files that the
+    # page loads once it is filtered or expanded
+    page = get_config().page
+    inline_projects = projects[:page.inline_projects] if page.inline_projects > 0 else projects
+    chunks = project_chunks(projects, max(1, page.chunk_size)) if len(inline_projects) < len(projects) else ()
+    
+    # Chunks are written one at a time, before the page, so the page never
+    # refers to a chunk that isn't there yet
+    chunk_dir = dist_folder / 'projects'
+    chunk_paths = []
+    chunk_urls = []
+    chunks_digest = hashlib.sha256()
+    for index, body in enumerate(chunks):
+        chunk_dir.mkdir(exist_ok=True)
+        chunk_paths.append(chunk_dir / f'{index}.js')
+        chunks_digest.update(body.encode())
+        writer.write(chunk_paths[-1], body)
+        if server is not None:
+            chunk_urls.append(f'/projects/{index}.js')
+            server.publish(chunk_urls[-1], body, 'text/javascript; charset=utf-8')
+    if chunk_dir.exists():
+        for path in chunk_dir.glob('*.js'):
+            if path not in chunk_paths:
+                writer.remove(path)
+    chunks_version = chunks_digest.hexdigest()[:12]
     
     # Prepare data for template
     template_data = {
         'email_counts': email_counts,
         'weather': weather_data,
-        'projects': projects,
+        'projects': inline_projects,
+        'project_total': len(projects),
+        'project_chunks': len(chunk_paths),
+        'chunks_version': chunks_version,
         'current_time': current_time,
         'date': datetime.now().strftime("%a, %b %d, %Y"),
-        'temp_units': 'C' if dashboard_config.weather.units == 'metric' else 'F',
-        'wind_units': 'kph' if dashboard_config.weather.units == 'metric' else 'mph'
+        'temp_units': 'C' if get_config().weather.units == 'metric' else 'F',
+        'wind_units': 'kph' if get_config().weather.units == 'metric' else 'mph',
+        'poll_seconds': get_config().serve.poll_seconds,
+        'trends': trends,
+        # Generation cost so far (the render itself isn't finished yet)
+        'timings': profiling.summary(get_config().profile.slowest) if get_config().profile.footer else None
     }
     
-    # Set up Jinja2 environment
+    # When served, each card is rendered on its own so it can also be served as
+    # a widget; otherwise the page includes them and they are streamed with it
+    env = get_template_env()
+    cards = widget_etags = None
+    if server is not None:
+        cards = {name: env.get_template(f'cards/{name}.html').render(template_data) for name in WIDGETS}
+        widget_etags = {name: hashlib.sha256(html.encode()).hexdigest()[:32] for name, html in cards.items()}
+    
+    # The page is self-contained: minified styles and only the icons it can show are inlined
     template_dir = Path(__file__).parent / "templates"
-    env = Environment(loader=FileSystemLoader(template_dir.resolve()))
+    weather_icons = [icon_name for _, icon_name in WEATHER_MAP.values()]
+    sprite = icon_sprite(referenced_icons(template_dir, weather_icons))
+    
+    # Render template, writing to the file in the dist folder only if the page changed
     template = env.get_template('dashboard.html')
+    page_parts = template.generate(template_data, cards=cards, widget_etags=widget_etags,
+                                   styles=load_styles(), icon_sprite=sprite)
+    if server is None:
+        writer.write_stream(output_path, page_parts)
+    else:
+        html_output = ''.join(page_parts)
+        writer.write(output_path, html_output)
+    writer.set_page_key(output_path, page_key)
+    writer.save()
     
-    # Render template
-    html_output = template.render(template_data)
+    if server is not None:
+        server.publish('/dashboard.html', html_output, 'text/html; charset=utf-8')
+        server.remove_stale('/projects/', chunk_urls)
+        values = {'weather': weather_data, 'email': email_counts, 'projects': inline_projects}
+        for name in WIDGETS:
+            widget = {
+                'etag': widget_etags[name],
+                'updated': current_time,
+                'html': cards[name],
+                'data': _dump_source(name, values[name]),
+            }
+            # The ETag follows the card, so clients only re-fetch when it would look different
+            server.publish(f'/api/{name}.json', json.dumps(widget, default=str),
+                           'application/json', etag=widget_etags[name])
     
-    # Write to file in dist folder
-    output_path = dist_folder / 'dashboard.html'
-    output_path.write_text(html_output)
+    return output_path
+
+def generate_dashboard(force=False):
+    """Generate the HTML dashboard"""
+    # Refresh the sources that are due concurrently, bounded by a single deadline,
+    # and take everything else from the stored state
+    state = SourceState.load()
+    data = fetch_sources(get_sources(), get_config().fetch.deadline, state, force=force)
+    state.save()
     
+    record_history(data['email'], data['projects'])
+    output_path = render_dashboard(data['email'], data['weather'], data['projects'])
     print(f"Dashboard generated successfully! File saved to {str(output_path)}")
+    
+    # Projects still being collected keep the process alive anyway (their
+    # worker threads are joined at exit), so make sure their results are kept
+    wait_for_late_sources()
+
+def profile_dashboard(force=False):
+    """Generate the dashboard under cProfile, then report the slowest stages and projects"""
+    profiling.enable_cprofile()
+    profiled(generate_dashboard)(force=force)
+    profiling.print_summary(profiling.summary(get_config().profile.slowest))
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    for path in profiling.write_report(CACHE_DIR / "profile.json", get_config().profile.slowest):
+        print(f"Profile written to {path}")
+
+def discover_group_projects():
+    """List the project folders currently inside the configured project groups"""
+    found = set()
+    for group in get_config().project_groups:
+        try:
+            for child in group.iterdir():
+                if child.is_dir() and not child.name.startswith('.'):
+                    found.add(child.resolve())
+        except OSError:
+            continue
+    return found
+
+def run_daemon(server=None):
+    """Keep the dashboard up to date, recomputing only what changed
+
+    Projects are watched with inotify (falling back to periodic rescans where
+    it isn't available); email and weather refresh on their [refresh] intervals.
+    The page is re-rendered only when the data differs from the last render,
+    and published to server if one is given.
+    """
+    daemon = get_config().daemon
+    roots = set(get_config().projects) - discover_group_projects()
+    projects = {}
+    pending = set(item for item in get_config().projects if item.exists())
+    # Email and weather share their state with one-shot runs; projects are kept in memory
+    timed_sources = [source for source in get_sources() if source.name != 'projects']
+    state = SourceState.load()
+    data = {}
+    rescan_due = time.monotonic() + daemon.rescan_interval
+    history_due = 0
+    last_key = None
+    
+    # Weather readings past their TTL are shown while they refresh for the next render
+    get_weather_client(background=True)
+    
+    watcher = None
+    if Inotify.available():
+        def rules_for_project(project):
+            return IgnoreRules.for_project(project, get_config().scan.ignore)
+        # Our own output and cache folders change on every render
+        own_paths = [DIST_DIR, CACHE_DIR]
+        watcher = ProjectWatcher(rules_for_project, debounce=daemon.debounce, ignore_paths=own_paths)
+        for group in get_config().project_groups:
+            watcher.watch_group(group)
+        for item in pending:
+            watcher.watch_project(item)
+    else:
+        print("inotify is not available, projects are rescanned every "
+              f"{daemon.rescan_interval} seconds")
+    
+    if server is not None:
+        server.start()
+        print(f"Serving the dashboard at {server.url}")
+    print("Dashboard daemon started")
+    try:
+        while True:
+            now = time.monotonic()
+            
+            # Email and weather refresh on their own intervals
+            if not data or state.due(timed_sources):
+                data.update(fetch_sources(timed_sources, get_config().fetch.deadline, state))
+                state.save()
+            
+            if now >= rescan_due:
+                # Catch anything the watcher missed (or everything, without inotify)
+                pending |= set(projects)
+                rescan_due = now + daemon.rescan_interval
+            
+            if pending:
+                items = [item for item in pending if item.exists()]
+                for item in pending:
+                    projects.pop(item, None)
+                # Start with fresh snapshots
+                _snapshots.clear()
+                with span('projects'):
+                    for item, record in zip(items, iter_project_records(items)):
+                        projects[item] = record
+                get_scan_index().save()
+                get_progress_cache().save()
+                get_checklist_index().save()
+                get_git_reader().save()
+                print(f"Updated {len(items)} project(s)")
+                pending = set()
+            
+            project_list = sorted(projects.values(), key=lambda x: x.last_modified or 0, reverse=True)
+            key = _render_key(data['email'], data['weather'], project_list)
+            # History gets a sample whenever the data changes, and at least hourly
+            if key != last_key or now >= history_due:
+                record_history(data['email'], project_list)
+                history_due = now + 3600
+            if key != last_key:
+                output_path = render_dashboard(data['email'], data['weather'], project_list, server=server)
+                print(f"Dashboard updated at {datetime.now().strftime('%H:%M:%S')}: {output_path}")
+                last_key = key
+                # The next page's timings cover the work done for it
+                profiling.reset()
+            
+            next_fetch = min(state.next_due(source) for source in timed_sources) - time.time()
+            timeout = max(0, min(next_fetch, rescan_due - time.monotonic()))
+            if watcher is None:
+                time.sleep(timeout)
+                continue
+            
+            changed, groups_changed, overflow = watcher.wait(timeout)
+            for project, rels in changed.items():
+                # Files edited in place don't change their directory's mtime
+                get_scan_index().invalidate(project, rels)
+                pending.add(Path(project))
+            if overflow:
+                pending |= set(projects)
+            if groups_changed:
+                current = discover_group_projects() | roots
+                for item in current - set(projects) - pending:
+                    watcher.watch_project(item)
+                    pending.add(item)
+                for item in set(projects) - current:
+                    projects.pop(item, None)
+    except KeyboardInterrupt:
+        print("Dashboard daemon stopped")
+    finally:
+        if watcher is not None:
+            watcher.close()
+        if server is not None:
+            server.close()
+        get_imap_pool().close_all()
+        get_git_reader().close()
+        if _history is not None:
+            _history.close()
 
 def list_projects():
-    """Print each project from dashboard_config.projects to stdout as a single line"""
-    for project in dashboard_config.projects:
+    """Print each configured project to stdout as a single line"""
+    for project in get_project_paths():
         print(str(project))
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Generate dashboard or list projects')
     parser.add_argument('--list-projects', action='store_true', 
                         help='Print each project path to stdout as a single line')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Keep running, updating the dashboard as projects, email and weather change')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run as --daemon and also serve the dashboard over HTTP with live updates')
+    parser.add_argument('--force', action='store_true',
+                        help='Refresh every data source, even those not yet due')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print the slowest stages and projects and write a JSON and cProfile report to .cache/')
     
     args = parser.parse_args()
     
     if args.list_projects:
         list_projects()
     else:
-        generate_dashboard()
+        run_lock = acquire_run_lock()
+        if run_lock is None:
+            print("Another dashboard run is still in progress, skipping this one.")
+        elif args.serve:
+            from server import DashboardServer
+            serve = get_config().serve
+            try:
+                server = DashboardServer(serve.host, serve.port)
+            except OSError as e:
+                print(f"Can't serve the dashboard on {serve.host}:{serve.port}: {e}")
+            else:
+                run_daemon(server=server)
+        elif args.daemon:
+            run_daemon()
+        elif args.profile:
+            profile_dashboard(force=args.force)
+        else:
+            generate_dashboard(force=args.force)
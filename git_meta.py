@@ -0,0 +1,318 @@
+"""
+Subprocess-free reader for the bits of git metadata the dashboard shows.
+
+HEAD is resolved through loose and packed refs and the commit timestamp is
+read straight from the zlib-compressed loose object. Only commits that live
+in a pack file fall back to a ``git cat-file --batch`` process, which is
+started once per repository and reused for later lookups.
+
+Results are cached by the mtimes of HEAD, the branch ref file and
+packed-refs, in memory and in the cache folder.
+"""
+
+import os
+import re
+import struct
+import subprocess
+import threading
+import zlib
+
+from cache import load_json, save_json
+from profiling import count
+
+CACHE_FILE = "git_meta.json"
+
+_committer_re = re.compile(rb'^committer .* (\d+) [+-]\d{4}$', re.MULTILINE)
+
+def find_git_dir(project_path):
+    """Return (git dir, common dir) for a work tree, or (None, None)"""
+    dot_git = os.path.join(project_path, '.git')
+    if os.path.isdir(dot_git):
+        git_dir = dot_git
+    elif os.path.isfile(dot_git):
+        # Worktrees and submodules use a "gitdir: <path>" file
+        try:
+            with open(dot_git, 'r') as f:
+                line = f.read().strip()
+        except OSError:
+            return None, None
+        if not line.startswith('gitdir:'):
+            return None, None
+        git_dir = os.path.normpath(os.path.join(project_path, line[len('gitdir:'):].strip()))
+    else:
+        return None, None
+
+    common_dir = git_dir
+    try:
+        with open(os.path.join(git_dir, 'commondir'), 'r') as f:
+            common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+    except OSError:
+        pass
+    return git_dir, common_dir
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return 0
+
+def _read_packed_ref(common_dir, ref):
+    try:
+        with open(os.path.join(common_dir, 'packed-refs'), 'r') as f:
+            for line in f:
+                if line.startswith(('#', '^')):
+                    continue
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    except OSError:
+        pass
+    return None
+
+def resolve_head(git_dir, common_dir):
+    """Resolve HEAD to (ref name or None when detached, commit id or None)"""
+    try:
+        with open(os.path.join(git_dir, 'HEAD'), 'r') as f:
+            head = f.read().strip()
+    except OSError:
+        return None, None
+
+    ref = None
+    # Follow symbolic refs (HEAD -> refs/heads/main), guarding against loops
+    for _ in range(5):
+        if not head.startswith('ref:'):
+            return ref, head or None
+        ref = head[len('ref:'):].strip()
+        head = None
+        for base in (git_dir, common_dir):
+            try:
+                with open(os.path.join(base, ref), 'r') as f:
+                    head = f.read().strip()
+                break
+            except OSError:
+                continue
+        if head is None:
+            # Not a loose ref, so it's either packed or an unborn branch
+            return ref, _read_packed_ref(common_dir, ref)
+    return ref, None
+
+def _parse_commit_time(body):
+    match = _committer_re.search(body)
+    return int(match.group(1)) if match else None
+
+def read_loose_commit_time(common_dir, commit_id):
+    """Read the committer timestamp from a loose object, or None if it isn't loose"""
+    path = os.path.join(common_dir, 'objects', commit_id[:2], commit_id[2:])
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        count('bytes_read', len(raw))
+        data = zlib.decompress(raw)
+    except (OSError, zlib.error):
+        return None
+    header, _, body = data.partition(b'\0')
+    if not header.startswith(b'commit '):
+        return None
+    return _parse_commit_time(body)
+
+class CatFileBatch:
+    """A long-lived ``git cat-file --batch`` process for one repository"""
+
+    def __init__(self, git_dir):
+        self.git_dir = git_dir
+        self.process = None
+        self.lock = threading.Lock()
+
+    def read(self, object_id):
+        """Return (type, body) of an object, or None if it doesn't exist"""
+        with self.lock:
+            if self.process is None or self.process.poll() is not None:
+                self.process = subprocess.Popen(
+                    ["git", f"--git-dir={self.git_dir}", "cat-file", "--batch"],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+                )
+                count('subprocesses')
+            self.process.stdin.write(object_id.encode() + b'\n')
+            self.process.stdin.flush()
+            header = self.process.stdout.readline().split()
+            if len(header) != 3:
+                return None
+            size = int(header[2])
+            body = self.process.stdout.read(size + 1)[:size]
+            return header[1].decode(), body
+
+    def close(self):
+        with self.lock:
+            if self.process is not None:
+                self.process.stdin.close()
+                self.process.wait()
+                self.process = None
+
+def _entry_path_end(data, start, version, previous):
+    """Return (path, offset after the entry) for one index entry"""
+    if version == 4:
+        # Paths are prefix compressed: a varint count of bytes to drop, then a suffix
+        offset = start
+        byte = data[offset]
+        offset += 1
+        strip = byte & 0x7f
+        while byte & 0x80:
+            byte = data[offset]
+            offset += 1
+            strip = ((strip + 1) << 7) | (byte & 0x7f)
+        end = data.index(b'\0', offset)
+        path = previous[:len(previous) - strip] + data[offset:end]
+        return path, end + 1
+    end = data.index(b'\0', start)
+    # Entries are NUL padded to a multiple of eight bytes, counted from the entry start
+    return data[start:end], end
+
+def is_dirty(project_path, git_dir):
+    """Cheaply check whether any tracked file was modified or deleted
+
+    This compares the mtime and size recorded in the git index against the
+    working tree, which is the same fast path ``git status`` uses. Untracked
+    files and changes that are only staged are not reported.
+    """
+    try:
+        with open(os.path.join(git_dir, 'index'), 'rb') as f:
+            data = f.read()
+    except OSError:
+        return False
+    count('bytes_read', len(data))
+    if len(data) < 12 or data[:4] != b'DIRC':
+        return False
+
+    version, entry_count = struct.unpack('>II', data[4:12])
+    offset = 12
+    previous = b''
+    for _ in range(entry_count):
+        entry_start = offset
+        (_, _, mtime_s, mtime_ns, _, _, mode, _, _, size) = struct.unpack('>10I', data[offset:offset + 40])
+        flags = struct.unpack('>H', data[offset + 60:offset + 62])[0]
+        offset += 62
+        if version >= 3 and flags & 0x4000:
+            offset += 2
+        path, path_end = _entry_path_end(data, offset, version, previous)
+        previous = path
+        if version == 4:
+            offset = path_end
+        else:
+            entry_len = path_end - entry_start
+            offset = entry_start + ((entry_len + 8) & ~7)
+
+        # Skip gitlinks (submodules), whose work tree is a directory
+        if mode >> 12 == 0o16:
+            continue
+        count('files_stat')
+        try:
+            st = os.lstat(os.path.join(project_path, os.fsdecode(path)))
+        except OSError:
+            return True
+        # Git built without nanosecond support records 0 for the nanoseconds
+        if int(st.st_mtime) != mtime_s or (st.st_size & 0xffffffff) != size:
+            return True
+        if mtime_ns and st.st_mtime_ns % 1_000_000_000 != mtime_ns:
+            return True
+    return False
+
+class GitMetaReader:
+    """Reads commit time, branch and dirty flag for work trees, cached by ref and index mtimes"""
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+        self.batches = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        return cls(load_json(CACHE_FILE, {}))
+
+    def save(self):
+        with self.lock:
+            entries = {
+                path: entry for path, entry in self.entries.items()
+                if os.path.isdir(path)
+            }
+        save_json(CACHE_FILE, entries)
+
+    def close(self):
+        for batch in self.batches.values():
+            batch.close()
+        self.batches.clear()
+
+    def _batch(self, common_dir):
+        with self.lock:
+            batch = self.batches.get(common_dir)
+            if batch is None:
+                batch = self.batches[common_dir] = CatFileBatch(common_dir)
+            return batch
+
+    def _dirty(self, project_path, git_dir, cached, tree_key):
+        # The index changes on add, commit and checkout; tree_key (the newest
+        # mtime in the work tree) when tracked files are edited or deleted
+        try:
+            st = os.stat(os.path.join(git_dir, 'index'))
+            key = [st.st_mtime_ns, st.st_size, tree_key]
+        except OSError:
+            key = None
+        if tree_key is not None and key is not None and cached.get('dirty_key') == key:
+            return cached['dirty']
+        dirty = is_dirty(project_path, git_dir)
+        with self.lock:
+            cached['dirty_key'] = key
+            cached['dirty'] = dirty
+        return dirty
+
+    def read(self, project_path, check_dirty=True, tree_key=None):
+        """Return {'commit_time', 'branch', 'dirty'} for a project, or None if it isn't a repo
+
+        With a tree_key that changes whenever the work tree does (such as its
+        newest mtime from the scan index), the dirty flag is reused until it
+        or the git index changes, instead of stat'ing every tracked file.
+        """
+        project_path = str(project_path)
+        git_dir, common_dir = find_git_dir(project_path)
+        if git_dir is None:
+            return None
+
+        # HEAD moves on checkout, the branch ref on commit, packed-refs on gc
+        head_mtime = _mtime_ns(os.path.join(git_dir, 'HEAD'))
+        cached = self.entries.get(project_path)
+        ref_mtime = packed_mtime = 0
+        if cached is not None and cached['ref']:
+            ref_mtime = _mtime_ns(os.path.join(common_dir, cached['ref']))
+            packed_mtime = _mtime_ns(os.path.join(common_dir, 'packed-refs'))
+
+        if cached is None or cached['key'] != [head_mtime, ref_mtime, packed_mtime]:
+            ref, commit_id = resolve_head(git_dir, common_dir)
+            commit_time = None
+            if commit_id:
+                commit_time = read_loose_commit_time(common_dir, commit_id)
+                if commit_time is None:
+                    found = self._batch(common_dir).read(commit_id)
+                    if found is not None and found[0] == 'commit':
+                        commit_time = _parse_commit_time(found[1])
+
+            if ref and ref.startswith('refs/heads/'):
+                branch = ref[len('refs/heads/'):]
+            else:
+                branch = commit_id[:7] if commit_id else None
+
+            if ref:
+                ref_mtime = _mtime_ns(os.path.join(common_dir, ref))
+                packed_mtime = _mtime_ns(os.path.join(common_dir, 'packed-refs'))
+            cached = {
+                'key': [head_mtime, ref_mtime, packed_mtime],
+                'ref': ref,
+                'commit_time': commit_time or 0,
+                'branch': branch,
+            }
+            with self.lock:
+                self.entries[project_path] = cached
+
+        return {
+            'commit_time': cached['commit_time'],
+            'branch': cached['branch'],
+            'dirty': self._dirty(project_path, git_dir, cached, tree_key) if check_dirty else None,
+        }
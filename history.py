@@ -0,0 +1,172 @@
+"""
+Time series of project progress and unread counts, kept in SQLite.
+
+Every run adds its values to the current hourly bucket of each series (a
+project's progress, status and last modified time, a mailbox's unread
+count). A bucket keeps the sum, count, minimum and maximum of its samples,
+so buckets can be merged without losing their averages: hourly buckets are
+rolled up into daily ones after ``hourly_days``, daily ones into weekly ones
+after ``daily_days``, and weekly buckets are dropped after ``weekly_days``.
+The database stays bounded however long the dashboard runs, and a sparkline
+only reads the buckets of the days it shows.
+
+Buckets are aligned to UTC hours and days; weeks start on Thursdays, like
+the Unix epoch.
+"""
+
+import sqlite3
+import time
+
+from markupsafe import Markup
+
+HOUR = 3600
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+# Statuses as levels, so they can be averaged and plotted
+STATUS_LEVELS = {'Active': 0, 'Dormant': 1, 'Stale': 2, 'Abandoned': 3}
+
+# Seconds between checks for buckets to roll up
+COMPACT_INTERVAL = HOUR
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (kind, name)
+);
+CREATE TABLE IF NOT EXISTS points (
+    series_id INTEGER NOT NULL,
+    resolution INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    total REAL NOT NULL,
+    count INTEGER NOT NULL,
+    low REAL NOT NULL,
+    high REAL NOT NULL,
+    PRIMARY KEY (series_id, resolution, bucket)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value REAL
+);
+"""
+
+# Adds samples (or whole buckets, when rolling up) to a bucket
+UPSERT = """
+INSERT INTO points (series_id, resolution, bucket, total, count, low, high)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (series_id, resolution, bucket) DO UPDATE SET
+    total = total + excluded.total,
+    count = count + excluded.count,
+    low = min(low, excluded.low),
+    high = max(high, excluded.high)
+"""
+
+class History:
+    """Downsampled time series in a SQLite file"""
+
+    def __init__(self, path, hourly_days=7, daily_days=90, weekly_days=5 * 365):
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.hourly_seconds = hourly_days * DAY
+        self.daily_seconds = daily_days * DAY
+        self.weekly_seconds = weekly_days * DAY
+        self.series_ids = {}
+
+    def close(self):
+        self.conn.close()
+
+    def _series_id(self, kind, name):
+        key = (kind, name)
+        series_id = self.series_ids.get(key)
+        if series_id is None:
+            self.conn.execute("INSERT OR IGNORE INTO series (kind, name) VALUES (?, ?)", key)
+            series_id = self.conn.execute(
+                "SELECT id FROM series WHERE kind = ? AND name = ?", key
+            ).fetchone()[0]
+            self.series_ids[key] = series_id
+        return series_id
+
+    def record(self, samples, now=None):
+        """Add (kind, name, value) samples to the current hourly buckets"""
+        now = time.time() if now is None else now
+        bucket = int(now) // HOUR * HOUR
+        with self.conn:
+            self.conn.executemany(UPSERT, [
+                (self._series_id(kind, name), HOUR, bucket, value, 1, value, value)
+                for kind, name, value in samples
+            ])
+        last_compact = self.conn.execute("SELECT value FROM meta WHERE key = 'compacted'").fetchone()
+        if last_compact is None or now - last_compact[0] >= COMPACT_INTERVAL:
+            self.compact(now)
+
+    def _roll_up(self, source, target, cutoff):
+        # Only whole target buckets are rolled up, so none is split across resolutions
+        cutoff = int(cutoff) // target * target
+        rows = self.conn.execute(
+            f"""SELECT series_id, bucket / {target} * {target} AS target_bucket,
+                       sum(total), sum(count), min(low), max(high)
+                FROM points WHERE resolution = ? AND bucket < ?
+                GROUP BY series_id, target_bucket""",
+            (source, cutoff)
+        ).fetchall()
+        self.conn.executemany(UPSERT, [
+            (series_id, target, bucket, total, count, low, high)
+            for series_id, bucket, total, count, low, high in rows
+        ])
+        self.conn.execute("DELETE FROM points WHERE resolution = ? AND bucket < ?", (source, cutoff))
+
+    def compact(self, now=None):
+        """Roll old buckets up to coarser ones and drop what is past retention"""
+        now = time.time() if now is None else now
+        with self.conn:
+            self._roll_up(HOUR, DAY, now - self.hourly_seconds)
+            self._roll_up(DAY, WEEK, now - self.daily_seconds)
+            self.conn.execute("DELETE FROM points WHERE resolution = ? AND bucket < ?",
+                              (WEEK, now - self.weekly_seconds))
+            # Series of removed projects and mailboxes go once their last point has
+            self.conn.execute("DELETE FROM series WHERE id NOT IN (SELECT DISTINCT series_id FROM points)")
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('compacted', ?)", (now,))
+        self.series_ids.clear()
+
+    def daily(self, kind, days=30, now=None):
+        """Return {name: [(day, mean value), ...]} for every series of a kind
+
+        Reads the hourly and daily buckets of the last days only, so the cost
+        doesn't grow with the length of the history.
+        """
+        now = time.time() if now is None else now
+        start = (int(now) // DAY - days + 1) * DAY
+        rows = self.conn.execute(
+            f"""SELECT series.name, points.bucket / {DAY} * {DAY} AS day, sum(total) / sum(count)
+                FROM points JOIN series ON series.id = points.series_id
+                WHERE series.kind = ? AND points.resolution <= ? AND points.bucket >= ?
+                GROUP BY series.name, day ORDER BY series.name, day""",
+            (kind, DAY, start)
+        ).fetchall()
+        result = {}
+        for name, day, value in rows:
+            result.setdefault(name, []).append((day, value))
+        return result
+
+def sparkline(points, low=None, high=None, width=60, height=14):
+    """Inline SVG line for [(timestamp, value), ...]; empty with fewer than two points
+
+    The value axis spans low..high, by default the range of the values.
+    """
+    if len(points) < 2:
+        return ''
+    values = [value for _, value in points]
+    low = min(values) if low is None else low
+    high = max(values) if high is None else high
+    first, last = points[0][0], points[-1][0]
+    x_range = (last - first) or 1
+    y_range = (high - low) or 1
+    coords = ' '.join(
+        f"{(t - first) / x_range * width:.1f},{height - 1 - (value - low) / y_range * (height - 2):.1f}"
+        for t, value in points
+    )
+    return Markup(f'<svg class="sparkline" width="{width}" height="{height}" viewBox="0 0 {width} {height}" '
+                  f'aria-hidden="true"><polyline points="{coords}"/></svg>')
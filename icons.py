@@ -0,0 +1,85 @@
+"""
+Self-hosted SVG icons, replacing the Font Awesome webfont from the CDN.
+
+Icons are drawn on a 24x24 grid as strokes in the current text color and
+keyed by the Font Awesome class names the templates and WeatherResponse
+already use. The page embeds one hidden SVG sprite with the icons it can
+show (see icon_sprite), and each icon on the page is a small <svg> that
+references its symbol. The page needs no font or stylesheet download and
+works offline.
+"""
+
+import re
+from pathlib import Path
+
+from markupsafe import Markup
+
+# Cloud outlines shared by the weather icons: centered, and raised to leave room for precipitation
+_CLOUD = '<path d="M7 19h10a4 4 0 0 0 .5-7.97A6 6 0 0 0 6.1 10.5A4.3 4.3 0 0 0 7 19z"/>'
+_CLOUD_HIGH = '<path d="M7 14h10a4 4 0 0 0 .5-7.97A6 6 0 0 0 6.1 5.5A4.3 4.3 0 0 0 7 14z"/>'
+_SMALL_SUN = ('<circle cx="7" cy="7" r="2.5"/>'
+              '<path d="M7 2v1M2 7h1M3.46 3.46l.7.7M10.54 3.46l-.7.7M3.46 10.54l.7-.7"/>')
+
+ICONS = {
+    'fa-sun': ('<circle cx="12" cy="12" r="4"/>'
+               '<path d="M12 2v2M12 20v2M2 12h2M20 12h2M4.93 4.93l1.41 1.41M17.66 17.66l1.41 1.41'
+               'M4.93 19.07l1.41-1.41M17.66 6.34l1.41-1.41"/>'),
+    'fa-cloud-sun': _SMALL_SUN + '<path d="M10 21h8a3.5 3.5 0 0 0 .5-6.96A4.5 4.5 0 0 0 10.3 13.7A3.7 3.7 0 0 0 10 21z"/>',
+    'fa-cloud': _CLOUD,
+    'fa-smog': _CLOUD_HIGH + '<path d="M3 18h13M8 21.5h13"/>',
+    'fa-cloud-rain': _CLOUD_HIGH + '<path d="M8 17l-1 4M12 17l-1 4M16 17l-1 4"/>',
+    'fa-cloud-showers-heavy': _CLOUD_HIGH + '<path d="M6 17l-1.5 5M10 17l-1.5 5M14 17l-1.5 5M18 17l-1.5 5"/>',
+    'fa-cloud-showers-water': (_CLOUD_HIGH + '<path d="M7 16l-.8 2.5M11 16l-.8 2.5M15 16l-.8 2.5M19 16l-.8 2.5'
+                               'M2 21.5c1.67-1.33 3.33-1.33 5 0s3.33 1.33 5 0 3.33-1.33 5 0 3.33 1.33 5 0"/>'),
+    'fa-cloud-sun-rain': (_SMALL_SUN + '<path d="M10 16h8a3.5 3.5 0 0 0 .5-6.96A4.5 4.5 0 0 0 10.3 8.7A3.7 3.7 0 0 0 10 16z'
+                          'M11 19l-1 3M15 19l-1 3M19 19l-1 3"/>'),
+    'fa-cloud-meatball': (_CLOUD_HIGH + '<path d="M8 17l-1 4M16 17l-1 4"/>'
+                          '<circle cx="11.5" cy="19.5" r="1.25" fill="currentColor" stroke="none"/>'),
+    'fa-cloud-snow': (_CLOUD_HIGH + '<circle cx="8" cy="18" r="1" fill="currentColor" stroke="none"/>'
+                      '<circle cx="12" cy="21" r="1" fill="currentColor" stroke="none"/>'
+                      '<circle cx="16" cy="18" r="1" fill="currentColor" stroke="none"/>'),
+    'fa-snowflake': ('<path d="M12 2v20M3.34 7l17.32 10M3.34 17l17.32-10'
+                     'M9.5 3.5l2.5 2 2.5-2M9.5 20.5l2.5-2 2.5 2'
+                     'M3.2 10.2l3.5.3-1.3-3M20.8 13.8l-3.5-.3 1.3 3'
+                     'M3.2 13.8l3.5-.3-1.3 3M20.8 10.2l-3.5.3 1.3-3"/>'),
+    'fa-icicles': '<path d="M2 4h20M3.5 4L6 14l2.5-10M9.5 4L12 20l2.5-16M15.5 4L18 11l2.5-7"/>',
+    'fa-bolt-lightning': '<path d="M13 2L4 14h7l-1 8 9-12h-7l1-8z"/>',
+    'fa-cloud-bolt': _CLOUD_HIGH + '<path d="M13 15.5l-2.5 3h4l-2.5 3.5"/>',
+    'fa-question': ('<path d="M8.5 8.5a3.5 3.5 0 1 1 4.7 3.3c-.7.33-1.2 1-1.2 1.8V15.5"/>'
+                    '<circle cx="12" cy="19.5" r="1.2" fill="currentColor" stroke="none"/>'),
+    'fa-umbrella': '<path d="M2 12a10 10 0 0 1 20 0zM12 12v7a2 2 0 0 1-4 0"/>',
+    'fa-droplet': '<path d="M12 3C12 3 5 11 5 15a7 7 0 0 0 14 0c0-4-7-12-7-12z"/>',
+    'fa-wind': '<path d="M3 9h11a3 3 0 1 0-3-3M3 13h15a3 3 0 1 1-3 3M3 17h6"/>',
+    'fa-copy': ('<rect x="8" y="8" width="13" height="13" rx="2"/>'
+                '<path d="M5 16H4a2 2 0 0 1-2-2V4a2 2 0 0 1 2-2h10a2 2 0 0 1 2 2v1"/>'),
+    'fa-circle': '<circle cx="12" cy="12" r="10" fill="currentColor" stroke="none"/>',
+    'fa-code-branch': ('<circle cx="6" cy="5" r="2.5"/><circle cx="6" cy="19" r="2.5"/><circle cx="18" cy="7" r="2.5"/>'
+                       '<path d="M6 7.5v9M18 9.5c0 4-3 6-9.5 7.5"/>'),
+}
+
+FALLBACK_ICON = 'fa-question'
+
+_template_icon_re = re.compile(r'''icon\(\s*['"](fa-[\w-]+)['"]''')
+
+def icon(name, classes=''):
+    """Markup for one icon, referencing its symbol in the page's sprite"""
+    if name not in ICONS:
+        name = FALLBACK_ICON
+    css_class = f'icon {name} {classes}'.strip()
+    return Markup(f'<svg class="{css_class}" aria-hidden="true"><use href="#{name}"></use></svg>')
+
+def icon_sprite(names):
+    """A hidden SVG holding a <symbol> for each named icon"""
+    symbols = ''.join(
+        f'<symbol id="{name}" viewBox="0 0 24 24">{ICONS[name]}</symbol>'
+        for name in sorted(set(names) | {FALLBACK_ICON}) if name in ICONS
+    )
+    return Markup(f'<svg xmlns="http://www.w3.org/2000/svg" width="0" height="0" '
+                  f'style="position:absolute" aria-hidden="true">{symbols}</svg>')
+
+def referenced_icons(template_dir, extra=()):
+    """Icon names used by icon('...') calls in the templates, plus extra (e.g. the weather icons)"""
+    names = set(extra)
+    for path in Path(template_dir).rglob('*.html'):
+        names.update(_template_icon_re.findall(path.read_text()))
+    return names
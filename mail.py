@@ -0,0 +1,271 @@
+"""
+IMAP helpers: a small connection pool and unread counting via STATUS.
+
+Unread counts come from ``STATUS <mailbox> (UNSEEN)``, which returns a single
+number without selecting the mailbox or transferring message ids. Logged-in
+connections are kept per account and reused across mailboxes and refreshes.
+MailboxSync adds previews of the newest unread messages on top of that,
+fetching only what changed since the previous sync.
+"""
+
+import imaplib
+import re
+import threading
+from email.header import decode_header, make_header
+from email.parser import BytesParser
+from email.utils import parseaddr
+
+from cache import load_json, save_json
+from profiling import count
+
+SYNC_CACHE_FILE = "imap_sync.json"
+
+_status_re = re.compile(rb'\(([^)]*)\)\s*$')
+
+def quote_mailbox(name):
+    """Quote a mailbox name for use as an IMAP astring"""
+    return '"' + name.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+def parse_status(data, item):
+    """Return an integer item (e.g. b'UNSEEN') from a STATUS response"""
+    for line in data:
+        if isinstance(line, tuple):
+            line = line[0]
+        if not line:
+            continue
+        match = _status_re.search(line)
+        if not match:
+            continue
+        fields = match.group(1).split()
+        for key, value in zip(fields[::2], fields[1::2]):
+            if key.upper() == item:
+                return int(value)
+    raise imaplib.IMAP4.error(f"No {item.decode()} in STATUS response: {data!r}")
+
+def count_unseen(conn, mailbox):
+    """Count unread messages in a mailbox without selecting it"""
+    typ, data = conn.status(quote_mailbox(mailbox), '(UNSEEN)')
+    if typ != 'OK':
+        raise imaplib.IMAP4.error(f"STATUS {mailbox} failed: {data!r}")
+    return parse_status(data, b'UNSEEN')
+
+class ImapPool:
+    """Logged-in IMAP connections, one per account, reused between calls"""
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.connections = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(account):
+        return (account.host, account.port, account.user)
+
+    def _connect(self, account):
+        if account.use_ssl:
+            conn = imaplib.IMAP4_SSL(account.host, account.port, timeout=self.timeout)
+        else:
+            conn = imaplib.IMAP4(account.host, account.port, timeout=self.timeout)
+        count('imap_connections')
+        try:
+            conn.login(account.user, account.password)
+        except Exception:
+            conn.shutdown()
+            raise
+        return conn
+
+    def _discard(self, key):
+        conn = self.connections.pop(key, None)
+        if conn is not None:
+            try:
+                conn.logout()
+            except Exception:
+                pass
+
+    def run(self, account, func):
+        """Call func(conn) with the account's connection, reconnecting once if it went stale"""
+        key = self._key(account)
+        with self.lock:
+            account_lock = self.locks.setdefault(key, threading.Lock())
+
+        # Only one thread talks to an account's connection at a time
+        with account_lock:
+            conn = self.connections.get(key)
+            if conn is not None:
+                try:
+                    return func(conn)
+                except (imaplib.IMAP4.abort, OSError):
+                    # The server dropped an idle connection; start over
+                    self._discard(key)
+            conn = self._connect(account)
+            self.connections[key] = conn
+            try:
+                return func(conn)
+            except (imaplib.IMAP4.abort, OSError):
+                self._discard(key)
+                raise
+
+    def close_all(self):
+        """Log out of every pooled connection"""
+        with self.lock:
+            keys = list(self.connections)
+        for key in keys:
+            self._discard(key)
+
+_fetch_uid_re = re.compile(rb'UID (\d+)')
+_fetch_flags_re = re.compile(rb'FLAGS \(([^)]*)\)')
+
+PREVIEW_FIELDS = 'BODY.PEEK[HEADER.FIELDS (FROM SUBJECT DATE)]'
+
+def _decode_header(value):
+    if not value:
+        return ''
+    try:
+        return str(make_header(decode_header(value))).strip()
+    except Exception:
+        return value.strip()
+
+def _parse_preview(header_bytes):
+    message = BytesParser().parsebytes(header_bytes, headersonly=True)
+    sender_name, sender_address = parseaddr(_decode_header(message.get('From')))
+    return {
+        'sender': sender_name or sender_address,
+        'subject': _decode_header(message.get('Subject')) or '(no subject)',
+        'date': message.get('Date', ''),
+    }
+
+def _search_uids(conn, *criteria):
+    typ, data = conn.uid('SEARCH', *criteria)
+    if typ != 'OK':
+        raise imaplib.IMAP4.error(f"UID SEARCH failed: {data!r}")
+    return {int(uid) for uid in (data[0] or b'').split()}
+
+class MailboxSync:
+    """Incremental unread previews per mailbox, cached between runs
+
+    The cache for each mailbox is keyed on UIDVALIDITY plus HIGHESTMODSEQ
+    (when the server supports CONDSTORE) or UIDNEXT and the unread count.
+    An unchanged mailbox costs a single STATUS. Otherwise only the flags of
+    known messages that changed (CHANGEDSINCE) and the headers of new unread
+    messages are fetched.
+    """
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        return cls(load_json(SYNC_CACHE_FILE, {}))
+
+    def save(self):
+        with self.lock:
+            entries = dict(self.entries)
+        save_json(SYNC_CACHE_FILE, entries)
+
+    def sync(self, conn, account, mailbox, previews):
+        """Return (unread count, newest previews) for a mailbox"""
+        key = f"{account.user}@{account.host}:{account.port}/{mailbox}"
+        condstore = 'CONDSTORE' in conn.capabilities
+        items = 'UNSEEN UIDNEXT UIDVALIDITY' + (' HIGHESTMODSEQ' if condstore else '')
+        typ, data = conn.status(quote_mailbox(mailbox), f'({items})')
+        if typ != 'OK':
+            raise imaplib.IMAP4.error(f"STATUS {mailbox} failed: {data!r}")
+        unseen_count = parse_status(data, b'UNSEEN')
+        uidnext = parse_status(data, b'UIDNEXT')
+        uidvalidity = parse_status(data, b'UIDVALIDITY')
+        modseq = parse_status(data, b'HIGHESTMODSEQ') if condstore else None
+
+        cached = self.entries.get(key)
+        if cached is not None and cached['uidvalidity'] != uidvalidity:
+            # UIDs were renumbered, nothing cached is valid any more
+            cached = None
+
+        if (cached is not None and cached['uidnext'] == uidnext
+                and cached['modseq'] == modseq and len(cached['unseen']) == unseen_count
+                and len(cached['previews']) >= min(previews, unseen_count)):
+            return unseen_count, self._newest(cached, previews)
+
+        typ, data = conn.select(quote_mailbox(mailbox), readonly=True)
+        if typ != 'OK':
+            raise imaplib.IMAP4.error(f"EXAMINE {mailbox} failed: {data!r}")
+        try:
+            if cached is None:
+                unseen = _search_uids(conn, 'UNSEEN')
+                known = {}
+            else:
+                unseen = set(cached['unseen'])
+                known = {int(uid): preview for uid, preview in cached['previews'].items()}
+                if uidnext > cached['uidnext']:
+                    # "n:*" always matches the last message, so filter by uid
+                    new = _search_uids(conn, 'UID', f"{cached['uidnext']}:*", 'UNSEEN')
+                    unseen |= {uid for uid in new if uid >= cached['uidnext']}
+                if condstore and cached['modseq'] is not None:
+                    if cached['modseq'] != modseq and cached['uidnext'] > 1:
+                        self._apply_flag_changes(conn, cached, unseen)
+                else:
+                    # Without CONDSTORE there is no cheap way to see flag changes
+                    unseen = _search_uids(conn, 'UNSEEN')
+                if len(unseen) != unseen_count:
+                    # Messages were expunged, resynchronise the unread set
+                    unseen = _search_uids(conn, 'UNSEEN')
+
+            newest = sorted(unseen)[-previews:] if previews else []
+            missing = [uid for uid in newest if uid not in known]
+            if missing:
+                known.update(self._fetch_previews(conn, missing))
+        finally:
+            conn.close()
+
+        entry = {
+            'uidvalidity': uidvalidity,
+            'uidnext': uidnext,
+            'modseq': modseq,
+            'unseen': sorted(unseen),
+            # Only keep headers for the messages that are shown
+            'previews': {str(uid): known[uid] for uid in newest if uid in known},
+        }
+        with self.lock:
+            self.entries[key] = entry
+        return unseen_count, self._newest(entry, previews)
+
+    @staticmethod
+    def _newest(entry, previews):
+        uids = sorted((int(uid) for uid in entry['previews']), reverse=True)[:previews]
+        return [entry['previews'][str(uid)] for uid in uids]
+
+    @staticmethod
+    def _apply_flag_changes(conn, cached, unseen):
+        typ, data = conn.uid('FETCH', f"1:{cached['uidnext'] - 1}",
+                             f"(UID FLAGS) (CHANGEDSINCE {cached['modseq']})")
+        if typ != 'OK':
+            raise imaplib.IMAP4.error(f"UID FETCH CHANGEDSINCE failed: {data!r}")
+        for line in data:
+            if isinstance(line, tuple):
+                line = line[0]
+            if not line:
+                continue
+            uid_match = _fetch_uid_re.search(line)
+            flags_match = _fetch_flags_re.search(line)
+            if not uid_match or not flags_match:
+                continue
+            uid = int(uid_match.group(1))
+            if b'\\Seen' in flags_match.group(1).split():
+                unseen.discard(uid)
+            else:
+                unseen.add(uid)
+
+    @staticmethod
+    def _fetch_previews(conn, uids):
+        typ, data = conn.uid('FETCH', ','.join(str(uid) for uid in uids), f'(UID {PREVIEW_FIELDS})')
+        if typ != 'OK':
+            raise imaplib.IMAP4.error(f"UID FETCH failed: {data!r}")
+        found = {}
+        for item in data:
+            if not isinstance(item, tuple):
+                continue
+            uid_match = _fetch_uid_re.search(item[0])
+            if uid_match:
+                found[int(uid_match.group(1))] = _parse_preview(item[1])
+        return found
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, EmailStr, model_validator
-from typing import List, Optional
+from typing import List, NamedTuple, Optional, Union
 from pathlib import Path
+from datetime import datetime
 
 class EmailAccount(BaseModel):
     name: str
@@ -10,6 +11,9 @@ class EmailAccount(BaseModel):
     port: int = 993
     use_ssl: bool = True
     mailboxes: List[str] = ["INBOX"]
+    # Number of newest unread messages to preview per mailbox (0 for counts only).
+    # Previews need a UID SEARCH whenever a mailbox changes on servers without CONDSTORE
+    previews: int = 0
     
     def __str__(self):
         return f"{self.name} ({self.user})"
@@ -19,6 +23,108 @@ class WeatherConfig(BaseModel):
     lat: float
     long: float
     units: str = "metric"
+    api_url: str = "https://api.open-meteo.com/v1/forecast"
+    # Seconds a cached Open-Meteo response is used before it is refreshed
+    cache_ttl: float = 900
+    # Request hourly data and summarize today/tomorrow (requires numpy)
+    forecast: bool = False
+    forecast_days: int = 2
+
+class ScanConfig(BaseModel):
+    full_rescan_hours: float = 24
+    # gitignore-style patterns pruned in every project, on top of its own .gitignore
+    ignore: List[str] = ["node_modules/", "__pycache__/", "venv/", "site-packages/"]
+    # Number of projects collected concurrently
+    workers: int = 8
+
+class FetchConfig(BaseModel):
+    # Seconds to wait for all data sources before rendering with last known values
+    deadline: float = 60
+    # Network timeout for individual IMAP/HTTP connections
+    timeout: float = 10
+
+class TestsConfig(BaseModel):
+    # Run tests/acceptance.py suites for tier 1 progress
+    enabled: bool = True
+    max_concurrency: int = 2
+    # Wall clock seconds before a suite is killed and shown as timed out
+    timeout: float = 120
+    # Per-suite rlimits (0 disables)
+    cpu_seconds: int = 120
+    memory_mb: int = 1024
+
+class RefreshConfig(BaseModel):
+    # Seconds between refreshes of each data source; runs in between reuse the stored result
+    email: float = 60
+    weather: float = 900
+    projects: float = 600
+
+class ServeConfig(BaseModel):
+    # Address for generate_dashboard.py --serve (keep it local, the page has mail previews)
+    host: str = "127.0.0.1"
+    port: int = 8787
+    # Seconds between widget refreshes in the served page
+    poll_seconds: float = 30
+
+class PageConfig(BaseModel):
+    # Most recent projects rendered into the page (0 renders all of them)
+    inline_projects: int = 50
+    # Projects per chunk file for the rest, loaded when the list is filtered or expanded
+    chunk_size: int = 500
+
+class ProfileConfig(BaseModel):
+    # Show the generation timings in a collapsed footer (the page then changes on every run)
+    footer: bool = False
+    # Number of slowest sources and projects listed in the footer and by --profile
+    slowest: int = 10
+
+class HistoryConfig(BaseModel):
+    # Record progress, status and unread counts on every run, for the sparklines
+    enabled: bool = True
+    # Days of hourly buckets, then daily buckets, then weekly buckets kept
+    hourly_days: float = 7
+    daily_days: float = 90
+    weekly_days: float = 5 * 365
+    # Days shown in each sparkline
+    sparkline_days: int = 30
+
+class DaemonConfig(BaseModel):
+    # Full project rescan, for changes inotify can't see (or without inotify)
+    rescan_interval: float = 3600
+    # Seconds to wait for file changes to settle before recomputing
+    debounce: float = 2
+
+# WMO weather code -> (description, icon)
+WEATHER_MAP = {
+    0: ("Clear sky", "fa-sun"),
+    1: ("Mainly clear", "fa-cloud-sun"),
+    2: ("Partly cloudy", "fa-cloud-sun"),
+    3: ("Overcast", "fa-cloud"),
+    45: ("Fog", "fa-smog"),
+    48: ("Depositing rime fog", "fa-smog"),
+    51: ("Light drizzle", "fa-cloud-rain"),
+    53: ("Moderate drizzle", "fa-cloud-rain"),
+    55: ("Dense drizzle", "fa-cloud-showers-heavy"),
+    56: ("Light freezing drizzle", "fa-icicles"),
+    57: ("Dense freezing drizzle", "fa-icicles"),
+    61: ("Slight rain", "fa-cloud-rain"),
+    63: ("Moderate rain", "fa-cloud-showers-heavy"),
+    65: ("Heavy rain", "fa-cloud-showers-heavy"),
+    66: ("Light freezing rain", "fa-cloud-meatball"),
+    67: ("Heavy freezing rain", "fa-cloud-meatball"),
+    71: ("Slight snow fall", "fa-snowflake"),
+    73: ("Moderate snow fall", "fa-snowflake"),
+    75: ("Heavy snow fall", "fa-snowflake"), # fa-snowflakes is Pro only, snowflake is free
+    77: ("Snow grains", "fa-cloud-snow"),
+    80: ("Slight rain showers", "fa-cloud-sun-rain"),
+    81: ("Moderate rain showers", "fa-cloud-showers-heavy"),
+    82: ("Violent rain showers", "fa-cloud-showers-water"),
+    85: ("Slight snow showers", "fa-cloud-snow"),
+    86: ("Heavy snow showers", "fa-cloud-snow"),
+    95: ("Thunderstorm", "fa-bolt-lightning"),
+    96: ("Thunderstorm with slight hail", "fa-cloud-bolt"),
+    99: ("Thunderstorm with heavy hail", "fa-cloud-bolt")
+}
 
 class WeatherResponse(BaseModel):
     code: int
@@ -30,46 +136,116 @@ class WeatherResponse(BaseModel):
     temp_units: str = "C"
     description: Optional[str] = None
     icon_class: Optional[str] = None
+    # When the reading was fetched, and whether it is older than the cache TTL
+    fetched_at: Optional[float] = None
+    stale: bool = False
+    age: Optional[str] = None
+    # Forecast summary (only filled in when forecast mode is enabled)
+    today_min: Optional[float] = None
+    today_max: Optional[float] = None
+    tomorrow_min: Optional[float] = None
+    tomorrow_max: Optional[float] = None
+    precipitation_windows: List[dict] = []
+    next_change_code: Optional[int] = None
+    next_change_time: Optional[str] = None
+    next_change_description: Optional[str] = None
 
     @model_validator(mode="after")
     def compute_derived_fields(self) -> "WeatherResponse":
-        weather_map = {
-            0: ("Clear sky", "fa-sun"),
-            1: ("Mainly clear", "fa-cloud-sun"),
-            2: ("Partly cloudy", "fa-cloud-sun"),
-            3: ("Overcast", "fa-cloud"),
-            45: ("Fog", "fa-smog"),
-            48: ("Depositing rime fog", "fa-smog"),
-            51: ("Light drizzle", "fa-cloud-rain"),
-            53: ("Moderate drizzle", "fa-cloud-rain"),
-            55: ("Dense drizzle", "fa-cloud-showers-heavy"),
-            56: ("Light freezing drizzle", "fa-icicles"),
-            57: ("Dense freezing drizzle", "fa-icicles"),
-            61: ("Slight rain", "fa-cloud-rain"),
-            63: ("Moderate rain", "fa-cloud-showers-heavy"),
-            65: ("Heavy rain", "fa-cloud-showers-heavy"),
-            66: ("Light freezing rain", "fa-cloud-meatball"),
-            67: ("Heavy freezing rain", "fa-cloud-meatball"),
-            71: ("Slight snow fall", "fa-snowflake"),
-            73: ("Moderate snow fall", "fa-snowflake"),
-            75: ("Heavy snow fall", "fa-snowflake"), # fa-snowflakes is Pro only, snowflake is free
-            77: ("Snow grains", "fa-box-tissue"),
-            80: ("Slight rain showers", "fa-cloud-sun-rain"),
-            81: ("Moderate rain showers", "fa-cloud-showers-heavy"),
-            82: ("Violent rain showers", "fa-cloud-showers-water"),
-            85: ("Slight snow showers", "fa-cloud-snow"),
-            86: ("Heavy snow showers", "fa-cloud-snow"),
-            95: ("Thunderstorm", "fa-bolt-lightning"),
-            96: ("Thunderstorm with slight hail", "fa-cloud-bolt"),
-            99: ("Thunderstorm with heavy hail", "fa-cloud-bolt")
-        }
-        
-        desc, icon = weather_map.get(self.code, ("Unknown", "fa-question"))
-        self.description = desc
+        desc, icon = WEATHER_MAP.get(self.code, ("Unknown", "fa-question"))
+        # Keep an explicit description (e.g. an error message)
+        if self.description is None:
+            self.description = desc
         self.icon_class = icon
+
+        if self.next_change_code is not None:
+            self.next_change_description = WEATHER_MAP.get(self.next_change_code, ("Unknown", None))[0]
+
+        if self.fetched_at is not None:
+            minutes = int((datetime.now().timestamp() - self.fetched_at) // 60)
+            if minutes < 60:
+                self.age = f"{minutes} min ago"
+            elif minutes < 48 * 60:
+                self.age = f"{minutes // 60} h ago"
+            else:
+                self.age = f"{minutes // (24 * 60)} days ago"
         return self
 
+class ProjectSnapshot(BaseModel):
+    """Everything the dashboard knows about a project, gathered in a single pass"""
+    name: str
+    path: Path
+    commit_time: float = 0
+    branch: Optional[str] = None
+    dirty: Optional[bool] = None
+    files_mtime: float = 0
+    checklist_paths: List[Path] = []
+    checklist_done: int = 0
+    checklist_todo: int = 0
+    checklist_date: float = 0
+    # Done/todo counts per checklist heading
+    checklist_sections: List[dict] = []
+    # Percentage of passing acceptance tests, or "Timed out"
+    test_progress: Union[float, str, None] = None
+    last_modified: float = 0
+    progress: Union[float, str] = "Unknown"
+    status: str = "Unknown"
+
+    @model_validator(mode="after")
+    def compute_derived_fields(self) -> "ProjectSnapshot":
+        # The most recent of the commit, file and checklist dates
+        self.last_modified = max(self.commit_time, self.files_mtime, self.checklist_date)
+
+        # Acceptance tests win over the checklist, otherwise progress is unknown
+        checklist_total = self.checklist_done + self.checklist_todo
+        if self.test_progress is not None:
+            self.progress = self.test_progress
+        elif checklist_total > 0:
+            self.progress = round((self.checklist_done / checklist_total) * 100, 2)
+        else:
+            self.progress = "Unknown"
+
+        if self.last_modified == 0:
+            self.status = "Unknown"
+        else:
+            days_diff = (datetime.now() - datetime.fromtimestamp(self.last_modified)).days
+            if days_diff < 30:
+                self.status = "Active"
+            elif days_diff < 180:
+                self.status = "Dormant"
+            elif days_diff < 365:
+                self.status = "Stale"
+            else:
+                self.status = "Abandoned"
+        return self
+
+class ProjectRecord(NamedTuple):
+    """One project as listed on the dashboard
+
+    A plain tuple rather than a model or dict, so thousands of them stay small.
+    """
+    name: str
+    path: Path
+    status: str
+    progress: Union[float, str]
+    branch: Optional[str] = None
+    dirty: Optional[bool] = None
+    last_modified: float = 0
+    last_modified_string: str = ''
+    # Per-heading checklist counts
+    sections: tuple = ()
+
 class DashboardConfig(BaseModel):
     weather: WeatherConfig
     email: List[EmailAccount]
     projects: List[Path]
+    project_groups: List[Path] = []
+    scan: ScanConfig = ScanConfig()
+    fetch: FetchConfig = FetchConfig()
+    tests: TestsConfig = TestsConfig()
+    refresh: RefreshConfig = RefreshConfig()
+    daemon: DaemonConfig = DaemonConfig()
+    serve: ServeConfig = ServeConfig()
+    page: PageConfig = PageConfig()
+    profile: ProfileConfig = ProfileConfig()
+    history: HistoryConfig = HistoryConfig()
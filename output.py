@@ -0,0 +1,127 @@
+"""
+Output stage for the files published in dist/.
+
+Every file is written through a temp file + rename, so a browser loading
+the dashboard never sees a half-written page, and only when its content
+actually changed. The content hash of each written file is remembered
+together with its size and mtime, so an unchanged file is recognized
+without reading it back. The page also remembers a key of the inputs it
+was rendered from, so it needn't even be rendered again while they and
+the file are unchanged.
+"""
+
+import hashlib
+import os
+import re
+import time
+
+from cache import AtomicFile, load_json, save_json, write_atomic
+
+CACHE_FILE = "output.json"
+
+_css_comment_re = re.compile(r'/\*.*?\*/', re.DOTALL)
+_css_space_re = re.compile(r'\s+')
+_css_punctuation_re = re.compile(r'\s*([{};,>])\s*')
+
+def minify_css(css):
+    """Strip comments and insignificant whitespace from a stylesheet
+
+    Deliberately conservative: whitespace is only removed around braces,
+    semicolons, commas and child combinators, and after colons, so
+    selectors like "a :hover" keep their meaning.
+    """
+    css = _css_comment_re.sub('', css)
+    css = _css_space_re.sub(' ', css)
+    css = _css_punctuation_re.sub(r'\1', css)
+    css = css.replace(': ', ':').replace(';}', '}')
+    return css.strip()
+
+class OutputWriter:
+    """Writes dist files atomically, skipping writes of unchanged content"""
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls):
+        return cls(load_json(CACHE_FILE, {}))
+
+    def save(self):
+        save_json(CACHE_FILE, self.entries)
+
+    def _unchanged(self, path, digest):
+        entry = self.entries.get(path, {})
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        return (entry.get('hash') == digest and entry.get('size') == st.st_size
+                and entry.get('mtime_ns') == st.st_mtime_ns)
+
+    def _remember(self, path, digest):
+        st = os.stat(path)
+        entry = self.entries.setdefault(path, {})
+        entry.update({'hash': digest, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns})
+
+    def write(self, path, content):
+        """Write content to path unless it already holds it, returning True if written"""
+        path = str(path)
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        if self._unchanged(path, digest):
+            return False
+
+        write_atomic(path, content)
+        self._remember(path, digest)
+        return True
+
+    def write_stream(self, path, chunks):
+        """Write an iterable of strings to path as they come, returning True if written
+
+        The content is hashed while it is written to a temp file, which only
+        replaces path if the content changed. The whole content is never held
+        in memory.
+        """
+        path = str(path)
+        digest = hashlib.sha256()
+        with AtomicFile(path) as f:
+            for chunk in chunks:
+                data = chunk.encode('utf-8')
+                digest.update(data)
+                f.write(data)
+            digest = digest.hexdigest()
+            if self._unchanged(path, digest):
+                return False
+            f.commit()
+        self._remember(path, digest)
+        return True
+
+    def remove(self, path):
+        """Delete a file that is no longer published"""
+        self.entries.pop(str(path), None)
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def is_current(self, path, page_key):
+        """Whether path was written from page_key and hasn't been touched since"""
+        path = str(path)
+        entry = self.entries.get(path, {})
+        return entry.get('page_key') == page_key and self._unchanged(path, entry.get('hash'))
+
+    def set_page_key(self, path, page_key):
+        """Remember the inputs path was last written from, for is_current()"""
+        self.entries.setdefault(str(path), {})['page_key'] = page_key
+
+    def updated_at(self, path, data_key):
+        """Timestamp at which the data behind path last changed
+
+        Reusing it while the data is the same keeps the rendered page
+        identical, so unchanged runs don't rewrite it.
+        """
+        path = str(path)
+        entry = self.entries.setdefault(path, {})
+        if entry.get('data_key') != data_key or 'updated_at' not in entry:
+            entry['data_key'] = data_key
+            entry['updated_at'] = time.time()
+        return entry['updated_at']
@@ -0,0 +1,138 @@
+"""
+Timing spans and counters for a dashboard run.
+
+span() times a block under a stage name, optionally labelled with the data
+source or project it was for, and count() adds to named counters (files
+stat'ed, directories listed, subprocesses spawned, bytes read). Both are
+thread-safe and cheap enough to stay on all the time; summary() reports
+everything recorded since the last reset().
+
+For --profile, enable_cprofile() makes functions wrapped with profiled() run
+under cProfile too. cProfile only sees the thread it was started in, so each
+call gets its own profiler and write_report() merges them.
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from cache import write_atomic
+
+_lock = threading.Lock()
+_spans = defaultdict(list)
+_counters = defaultdict(int)
+_started = time.perf_counter()
+
+# Finished cProfile profilers, or None while cProfile is off
+_profiles = None
+_profiling = threading.local()
+
+def reset():
+    """Forget the spans and counters recorded so far"""
+    global _started
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _started = time.perf_counter()
+
+@contextmanager
+def span(stage, label=None):
+    """Time the block under stage (and label, e.g. a project name)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            _spans[stage].append((label, elapsed))
+
+def count(name, amount=1):
+    """Add amount to a named counter"""
+    with _lock:
+        _counters[name] += amount
+
+def enable_cprofile():
+    """Run functions wrapped with profiled() under cProfile from now on"""
+    global _profiles
+    _profiles = []
+
+def profiled(func):
+    """Wrap func so its calls are profiled with cProfile once enable_cprofile() was called"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Only one profiler can be active per thread
+        if _profiles is None or getattr(_profiling, 'active', False):
+            return func(*args, **kwargs)
+        import cProfile
+        profile = cProfile.Profile()
+        _profiling.active = True
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            _profiling.active = False
+            with _lock:
+                _profiles.append(profile)
+    return wrapper
+
+def summary(slowest=10):
+    """Return what was recorded as JSON-friendly data
+
+    Stage totals are summed over threads, so concurrent stages can add up to
+    more than the elapsed time.
+    """
+    with _lock:
+        spans = {stage: list(entries) for stage, entries in _spans.items()}
+        counters = dict(_counters)
+        elapsed = time.perf_counter() - _started
+
+    stages = [
+        {'stage': stage, 'seconds': round(sum(seconds for _, seconds in entries), 4), 'calls': len(entries)}
+        for stage, entries in spans.items()
+    ]
+    stages.sort(key=lambda x: x['seconds'], reverse=True)
+    labelled = [
+        {'stage': stage, 'label': label, 'seconds': round(seconds, 4)}
+        for stage, entries in spans.items() for label, seconds in entries if label is not None
+    ]
+    labelled.sort(key=lambda x: x['seconds'], reverse=True)
+    return {
+        'elapsed': round(elapsed, 4),
+        'stages': stages,
+        'slowest': labelled[:slowest],
+        'counters': dict(sorted(counters.items())),
+    }
+
+def print_summary(data):
+    """Print a summary() for the console"""
+    print(f"Finished in {data['elapsed']:.2f}s")
+    print("Stages (seconds summed over threads):")
+    for stage in data['stages']:
+        print(f"  {stage['stage']:<12}{stage['seconds']:>9.3f}s  x{stage['calls']}")
+    if data['slowest']:
+        print("Slowest sources and projects:")
+        for entry in data['slowest']:
+            print(f"  {entry['stage']:<12}{entry['seconds']:>9.3f}s  {entry['label']}")
+    if data['counters']:
+        print("Counters:")
+        for name, value in data['counters'].items():
+            print(f"  {name:<16}{value:>12,}")
+
+def write_report(path, slowest=10):
+    """Write summary() to path as JSON, and merged cProfile stats next to it
+
+    Returns the paths written.
+    """
+    write_atomic(path, json.dumps(summary(slowest), indent=2) + '\n')
+    written = [path]
+    if _profiles:
+        import pstats
+        stats = pstats.Stats(_profiles[0])
+        for profile in _profiles[1:]:
+            stats.add(profile)
+        stats_path = path.with_suffix('.pstats')
+        stats.dump_stats(stats_path)
+        written.append(stats_path)
+    return written
@@ -0,0 +1,182 @@
+"""
+Acceptance test progress, cached on a content hash of the project.
+
+The key is a SHA-256 over the relative path and content digest of every
+source file the walker keeps (the test file included). File digests are
+remembered by (size, mtime) so unchanged files are not re-read, and pytest
+only runs when the key changes. Suites run through AcceptanceRunner, which
+bounds their concurrency, wall time, CPU time and memory. Results come from
+pytest's built-in JUnit XML report rather than from its console output.
+"""
+
+import hashlib
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import xml.etree.ElementTree as ET
+
+from cache import load_json, save_json
+from profiling import count
+from walker import walk_files
+
+CACHE_FILE = "progress.json"
+TEST_FILE = "tests/acceptance.py"
+
+# Progress reported for a suite that was killed at its timeout
+TIMED_OUT = "Timed out"
+
+# Run as: python -c LIMITS_WRAPPER <cpu seconds> <address space bytes> <command...>
+# Sets the rlimits (0 for none) and execs the command, so they apply before
+# it runs anything. preexec_fn would do the same, but isn't safe with threads.
+LIMITS_WRAPPER = """
+import os, resource, sys
+for limit, value in ((resource.RLIMIT_CPU, int(sys.argv[1])), (resource.RLIMIT_AS, int(sys.argv[2]))):
+    if value:
+        try:
+            resource.setrlimit(limit, (value, value))
+        except (OSError, ValueError):
+            pass
+os.execvp(sys.argv[3], sys.argv[3:])
+"""
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+            size += len(chunk)
+    count('bytes_read', size)
+    return digest.hexdigest()
+
+def parse_junit_report(report_path):
+    """Return (passed, failed) from a pytest JUnit XML report"""
+    root = ET.parse(report_path).getroot()
+    # pytest writes <testsuites><testsuite .../></testsuites>
+    suites = [root] if root.tag == 'testsuite' else root.findall('testsuite')
+    passed = failed = 0
+    for suite in suites:
+        tests = int(suite.get('tests', 0))
+        failures = int(suite.get('failures', 0)) + int(suite.get('errors', 0))
+        skipped = int(suite.get('skipped', 0))
+        passed += tests - failures - skipped
+        failed += failures
+    return passed, failed
+
+class AcceptanceRunner:
+    """Runs acceptance suites with a concurrency limit, a timeout and rlimits
+
+    Each suite runs in its own session (so a timeout kills the whole process
+    group), with no stdin and with CPU time and address space limits set by a
+    small exec wrapper before pytest starts. This bounds runaway suites; it is
+    not a security sandbox.
+    """
+
+    def __init__(self, max_concurrency=2, timeout=120, cpu_seconds=120, memory_mb=1024):
+        self.slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+
+    def _limited(self, command):
+        """Wrap command so it runs under the CPU and memory limits"""
+        if not (self.cpu_seconds or self.memory_mb):
+            return command
+        return [sys.executable, '-c', LIMITS_WRAPPER,
+                str(self.cpu_seconds or 0), str((self.memory_mb or 0) * 1024 * 1024), *command]
+
+    def __call__(self, project_path):
+        """Run a project's acceptance tests, returning the pass percentage, TIMED_OUT or None"""
+        test_file = os.path.join(project_path, TEST_FILE)
+        fd, report_path = tempfile.mkstemp(prefix="acceptance-", suffix=".xml")
+        os.close(fd)
+        try:
+            with self.slots:
+                process = subprocess.Popen(
+                    self._limited(["pytest", "-q", "--tb=no", "-p", "no:cacheprovider",
+                                   f"--junitxml={report_path}", test_file]),
+                    cwd=project_path, stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                    # Keep bytecode out of the tree so the run doesn't change the source key
+                    env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+                    start_new_session=True
+                )
+                count('subprocesses')
+                try:
+                    process.wait(timeout=self.timeout)
+                except subprocess.TimeoutExpired:
+                    try:
+                        os.killpg(process.pid, signal.SIGKILL)
+                    except OSError:
+                        pass
+                    process.wait()
+                    return TIMED_OUT
+            passed, failed = parse_junit_report(report_path)
+        except (OSError, ET.ParseError):
+            return None
+        finally:
+            os.unlink(report_path)
+
+        if (passed + failed) > 0:
+            return round((passed / (passed + failed)) * 100, 2)
+        return None
+
+class ProgressCache:
+    """Acceptance test results per project, keyed on a hash of the project sources"""
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        return cls(load_json(CACHE_FILE, {}))
+
+    def save(self):
+        with self.lock:
+            entries = {
+                path: entry for path, entry in self.entries.items()
+                if os.path.exists(os.path.join(path, TEST_FILE))
+            }
+        save_json(CACHE_FILE, entries)
+
+    def source_key(self, project_path, rules=None):
+        """Hash the project sources, returning (key, file digests to remember)"""
+        previous = self.entries.get(str(project_path), {}).get('files', {})
+        files = {}
+        for rel_path, st in walk_files(project_path, rules):
+            known = previous.get(rel_path)
+            if known is not None and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+                files[rel_path] = known
+                continue
+            try:
+                digest = _file_digest(os.path.join(project_path, rel_path))
+            except OSError:
+                continue
+            files[rel_path] = [st.st_size, st.st_mtime_ns, digest]
+
+        key = hashlib.sha256()
+        for rel_path in sorted(files):
+            key.update(rel_path.encode('utf-8', 'surrogateescape'))
+            key.update(b'\0')
+            key.update(files[rel_path][2].encode())
+        return key.hexdigest(), files
+
+    def get_progress(self, project_path, run, rules=None):
+        """Return the acceptance test result, calling run only if the sources changed"""
+        project_path = str(project_path)
+        if not os.path.exists(os.path.join(project_path, TEST_FILE)):
+            return None
+
+        key, files = self.source_key(project_path, rules)
+        entry = self.entries.get(project_path)
+        if entry is not None and entry['key'] == key:
+            return entry['progress']
+
+        progress = run(project_path)
+        with self.lock:
+            self.entries[project_path] = {'key': key, 'progress': progress, 'files': files}
+        return progress
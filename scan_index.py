@@ -0,0 +1,122 @@
+"""
+Persistent, incremental index of project modification times.
+
+For every project the index remembers each directory's own mtime, the newest
+mtime of the files directly inside it and its sub-directories. Hidden and ignored
+entries are pruned by the walker before they are descended into. A directory
+whose mtime has not changed since the last run has had no entries added,
+removed or renamed, so its cached values are reused without listing it again.
+A rescan therefore costs one stat per directory plus a listing of the
+directories that actually changed.
+
+Files edited in place do not touch their directory's mtime. Those edits are
+picked up by the periodic full rescan (see ``full_rescan_hours``), or right
+away by the daemon, which invalidates the directories its watcher saw change.
+"""
+
+import os
+import time
+
+from cache import load_json, save_json
+from profiling import count
+from walker import scan_directory
+
+INDEX_FILE = "scan_index.json"
+
+class ScanIndex:
+    """Directory mtime index for all scanned projects, persisted in the cache folder"""
+
+    def __init__(self, projects=None, full_rescan_hours=24):
+        self.projects = projects or {}
+        self.full_rescan_seconds = full_rescan_hours * 3600
+
+    @classmethod
+    def load(cls, full_rescan_hours=24):
+        data = load_json(INDEX_FILE, {})
+        return cls(data.get('projects', {}), full_rescan_hours=full_rescan_hours)
+
+    def save(self):
+        # Forget projects that no longer exist so the index stays bounded
+        self.projects = {
+            path: record for path, record in self.projects.items()
+            if os.path.isdir(path)
+        }
+        save_json(INDEX_FILE, {'projects': self.projects})
+
+    def cached_latest_mtime(self, project_path, max_age, ignore=(), rules=None):
+        """Return the newest mtime found by the last scan, or None if it's older than max_age seconds
+
+        Nothing is stat'ed, so changes made since that scan aren't seen.
+        """
+        record = self.projects.get(str(project_path))
+        if record is None or not record['dirs'] or time.time() - record.get('scanned', 0) > max_age:
+            return None
+        patterns = rules.patterns if rules is not None else []
+        if record['ignore'] != sorted(str(p) for p in ignore) or record.get('rules') != patterns:
+            return None
+        return max(max(entry[0] / 1e9, entry[1]) for entry in record['dirs'].values())
+
+    def invalidate(self, project_path, rels):
+        """Forget the cached scans of some of a project's directories (paths relative to the project)
+
+        The next latest_mtime() lists them again even if their mtime is unchanged.
+        """
+        record = self.projects.get(str(project_path))
+        if record is not None:
+            for rel in rels:
+                record['dirs'].pop(rel, None)
+
+    def latest_mtime(self, project_path, ignore=(), rules=None):
+        """Return the newest mtime of the project folder, its sub-folders and files
+
+        Entries pruned by rules (an IgnoreRules) are skipped without descending.
+        """
+        root = str(project_path)
+        ignore = sorted(str(p) for p in ignore)
+        ignore_set = set(ignore)
+        patterns = rules.patterns if rules is not None else []
+
+        # Get the mtime of the folder itself as a starting point
+        max_mtime = os.stat(root).st_mtime
+
+        now = time.time()
+        record = self.projects.get(root)
+        if (record is None or record['ignore'] != ignore
+                or record.get('rules') != patterns
+                or now - record['full_scan'] > self.full_rescan_seconds):
+            cached = {}
+            full_scan = now
+        else:
+            cached = record['dirs']
+            full_scan = record['full_scan']
+
+        dirs = {}
+        stack = ['']
+        while stack:
+            rel = stack.pop()
+            path = os.path.join(root, rel) if rel else root
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+
+            entry = cached.get(rel)
+            if entry is not None and entry[0] == st.st_mtime_ns:
+                files_max, subdirs = entry[1], entry[2]
+            else:
+                files_max, subdirs = scan_directory(path, rel, rules, ignore_set)
+
+            dirs[rel] = [st.st_mtime_ns, files_max, subdirs]
+            max_mtime = max(max_mtime, st.st_mtime, files_max)
+            stack.extend(f'{rel}/{name}' if rel else name for name in subdirs)
+
+        # One stat per directory; listings are counted by scan_directory
+        count('files_stat', len(dirs) + 1)
+        self.projects[root] = {
+            'ignore': ignore,
+            'rules': patterns,
+            'full_scan': full_scan,
+            'scanned': now,
+            'dirs': dirs,
+        }
+        return max_mtime
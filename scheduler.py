@@ -0,0 +1,66 @@
+"""
+Refresh scheduling for the dashboard's data sources.
+
+Each source declares how often it needs refreshing and roughly what a
+refresh costs. The latest result of every source is kept in a state file
+along with when it was taken, so a run only refreshes the sources that are
+due and the page is rendered from the merged state.
+"""
+
+import threading
+import time
+from typing import Callable, NamedTuple
+
+from cache import load_json, save_json
+
+STATE_FILE = "state.json"
+
+# Fraction of the interval a source may be refreshed early, so cron runs that
+# land a few seconds short of the interval don't skip a whole cycle
+DUE_SLACK = 0.1
+
+class Source(NamedTuple):
+    """A data source: its fetch function, refresh interval (seconds) and relative cost"""
+    name: str
+    fetch: Callable
+    interval: float
+    cost: int = 1
+
+class SourceState:
+    """Last result and refresh time of each source, persisted between runs"""
+
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+        # Sources that miss the fetch deadline store their results from their own threads
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls):
+        return cls(load_json(STATE_FILE, {}))
+
+    def save(self):
+        with self.lock:
+            save_json(STATE_FILE, self.entries)
+
+    def get(self, name):
+        """Return the stored result of a source, or None if it has never been refreshed"""
+        entry = self.entries.get(name)
+        return entry['value'] if entry is not None else None
+
+    def update(self, name, value, now=None):
+        with self.lock:
+            self.entries[name] = {'value': value, 'updated': now if now is not None else time.time()}
+
+    def next_due(self, source):
+        """Wall clock time at which a source is due for a refresh"""
+        entry = self.entries.get(source.name)
+        if entry is None:
+            return 0
+        return entry['updated'] + source.interval * (1 - DUE_SLACK)
+
+    def due(self, sources, now=None, force=False):
+        """Return the sources that need refreshing, most expensive first"""
+        now = now if now is not None else time.time()
+        due = [source for source in sources if force or self.next_due(source) <= now]
+        # Expensive sources start first so they get the most of the fetch deadline
+        return sorted(due, key=lambda source: source.cost, reverse=True)
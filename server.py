@@ -0,0 +1,125 @@
+"""
+Local HTTP server for generate_dashboard.py --serve.
+
+The latest rendered dashboard, one JSON document per widget and the
+project list chunks are kept in memory and served as they are. Each
+resource is gzip-compressed and hashed once when it is published, so
+requests only choose between the plain and compressed body or answer 304
+Not Modified when the client's If-None-Match matches.
+"""
+
+import gzip
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Bodies smaller than this are sent uncompressed
+GZIP_MIN_SIZE = 512
+
+class Resource:
+    """A published response body with its ETag and compressed form"""
+
+    __slots__ = ('body', 'gzipped', 'etag', 'content_type')
+
+    def __init__(self, body, content_type, etag=None):
+        self.body = body
+        self.content_type = content_type
+        self.etag = etag or hashlib.sha256(body).hexdigest()[:32]
+        self.gzipped = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_SIZE else None
+
+class DashboardServer:
+    """Serves the in-memory dashboard resources on a local port"""
+
+    def __init__(self, host='127.0.0.1', port=8787):
+        self.resources = {}
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def publish(self, path, body, content_type, etag=None):
+        """Replace the resource served at path"""
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        resource = Resource(body, content_type, etag)
+        with self.lock:
+            self.resources[path] = resource
+        return resource.etag
+
+    def remove_stale(self, prefix, keep):
+        """Stop serving the resources under prefix whose paths aren't in keep"""
+        with self.lock:
+            for path in [path for path in self.resources if path.startswith(prefix) and path not in keep]:
+                del self.resources[path]
+
+    def get(self, path):
+        with self.lock:
+            return self.resources.get(path)
+
+    def start(self):
+        """Serve requests on a background thread"""
+        thread = threading.Thread(target=self.httpd.serve_forever, name="dashboard-server", daemon=True)
+        thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._respond(send_body=True)
+
+            def do_HEAD(self):
+                self._respond(send_body=False)
+
+            def _respond(self, send_body):
+                path = self.path.split('?', 1)[0]
+                if path == '/':
+                    path = '/dashboard.html'
+                resource = server.get(path)
+                if resource is None:
+                    self.send_error(404)
+                    return
+
+                etag = f'"{resource.etag}"'
+                if_none_match = self.headers.get('If-None-Match')
+                if if_none_match:
+                    tags = {tag.strip() for tag in if_none_match.split(',')}
+                    tags = {tag[2:] if tag.startswith('W/') else tag for tag in tags}
+                    if etag in tags or '*' in tags:
+                        self.send_response(304)
+                        self.send_header('ETag', etag)
+                        self.send_header('Cache-Control', 'no-cache')
+                        self.end_headers()
+                        return
+
+                body = resource.body
+                use_gzip = (resource.gzipped is not None
+                            and 'gzip' in self.headers.get('Accept-Encoding', ''))
+                if use_gzip:
+                    body = resource.gzipped
+                self.send_response(200)
+                self.send_header('Content-Type', resource.content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                # Clients may keep a copy but must revalidate it (cheaply, with a 304)
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Vary', 'Accept-Encoding')
+                if use_gzip:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Polling would flood the console
+                pass
+
+        return Handler
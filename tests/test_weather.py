@@ -0,0 +1,93 @@
+"""
+summarize_forecast() against an Open-Meteo hourly response.
+
+The fixture is a two-day forecast (2024-03-14 and 15, local time) with a
+three-hour shower on the afternoon of the first day and one running up to
+the last hour of the second.
+"""
+
+import copy
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from weather import summarize_forecast
+
+FIXTURE = Path(__file__).parent / 'fixtures' / 'open_meteo_hourly.json'
+
+@pytest.fixture
+def response():
+    return json.loads(FIXTURE.read_text())
+
+def at(response, current_time):
+    """The response as if it was fetched at current_time"""
+    data = copy.deepcopy(response)
+    data['current']['time'] = current_time
+    return data
+
+def test_summary(response):
+    assert summarize_forecast(response) == {
+        'today_min': -3, 'today_max': 9,
+        'tomorrow_min': -1, 'tomorrow_max': 12,
+        'precipitation_windows': [
+            {'day': 'today', 'start': '15:00', 'end': '18:00', 'amount': 1.9},
+            {'day': 'tomorrow', 'start': '21:00', 'end': '00:00', 'amount': 1.5},
+        ],
+        'next_change_code': 61,
+        'next_change_time': '15:00',
+    }
+
+def test_last_hour_of_the_day(response):
+    summary = summarize_forecast(at(response, '2024-03-14T23:30'))
+    assert (summary['today_min'], summary['today_max']) == (-3, 9)
+    assert (summary['tomorrow_min'], summary['tomorrow_max']) == (-1, 12)
+    assert [window['day'] for window in summary['precipitation_windows']] == ['tomorrow']
+
+def test_past_midnight(response):
+    # The second day is now today, and there is no data for tomorrow
+    summary = summarize_forecast(at(response, '2024-03-15T00:10'))
+    assert (summary['today_min'], summary['today_max']) == (-1, 12)
+    assert 'tomorrow_min' not in summary
+    assert summary['precipitation_windows'][0]['day'] == 'today'
+    assert summary['next_change_time'] == '21:00'
+
+def test_window_in_progress(response):
+    # Only the rest of a shower that already started is counted
+    summary = summarize_forecast(at(response, '2024-03-14T16:30'))
+    assert summary['precipitation_windows'][0] == {'day': 'today', 'start': '16:00', 'end': '18:00', 'amount': 1.5}
+
+def test_window_running_to_the_end(response):
+    summary = summarize_forecast(at(response, '2024-03-15T22:00'))
+    assert summary['precipitation_windows'] == [{'day': 'today', 'start': '22:00', 'end': '00:00', 'amount': 1.3}]
+    assert 'next_change_code' not in summary
+
+def test_no_future_hours(response):
+    summary = summarize_forecast(at(response, '2024-03-16T02:00'))
+    assert summary == {'precipitation_windows': []}
+
+def test_max_windows(response):
+    windows = summarize_forecast(response, max_windows=1)['precipitation_windows']
+    assert [window['start'] for window in windows] == ['15:00']
+
+def test_mismatched_lengths(response):
+    hourly = response['hourly']
+    hourly['temperature_2m'].pop()
+    hourly['precipitation'] = hourly['precipitation'][:24]
+    hourly['weather_code'].pop()
+    # Arrays that don't line up with the hours are left out rather than misread
+    assert summarize_forecast(response) == {}
+
+def test_mismatched_temperature_only(response):
+    response['hourly']['temperature_2m'].pop()
+    summary = summarize_forecast(response)
+    assert 'today_min' not in summary
+    assert len(summary['precipitation_windows']) == 2
+    assert summary['next_change_time'] == '15:00'
+
+def test_no_hourly_data(response):
+    del response['hourly']
+    assert summarize_forecast(response) == {}
+    assert summarize_forecast({'hourly': {'time': []}}) == {}
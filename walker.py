@@ -0,0 +1,178 @@
+"""
+Pruning filesystem walker shared by the project scanners.
+
+Hidden entries and anything matched by the project's ``.gitignore`` or the
+global ``[scan] ignore`` list are dropped while a directory is listed, so
+ignored trees such as ``node_modules`` are never descended into.
+"""
+
+import os
+import re
+
+from profiling import count
+
+def _translate(pattern):
+    """Translate a gitignore glob into a regular expression fragment"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern[i:i + 2] == '**':
+                if pattern[i + 2:i + 3] == '/':
+                    # '**/' matches zero or more directories
+                    out.append('(?:.*/)?')
+                    i += 3
+                else:
+                    out.append('.*')
+                    i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace('\\', '\\\\')
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append(f'[{body}]')
+                i = end + 1
+                continue
+        elif c == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+class IgnoreRules:
+    """Compiled gitignore-style patterns, matched against project-relative paths"""
+
+    def __init__(self, patterns=()):
+        self.patterns = []
+        self._rules = []
+        for line in patterns:
+            self.add(line)
+
+    @classmethod
+    def for_project(cls, project_path, global_patterns=()):
+        """Build the rules for a project from the global list plus its .gitignore"""
+        rules = cls(global_patterns)
+        try:
+            with open(os.path.join(project_path, '.gitignore'), 'r') as f:
+                for line in f:
+                    rules.add(line)
+        except (OSError, UnicodeDecodeError):
+            pass
+        return rules
+
+    def add(self, line):
+        line = line.rstrip('\n')
+        # Trailing spaces are ignored unless escaped
+        if not line.endswith('\\ '):
+            line = line.rstrip(' ')
+        if not line or line.startswith('#'):
+            return
+
+        self.patterns.append(line)
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        elif line.startswith('\\'):
+            line = line[1:]
+
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            return
+
+        # A slash anywhere but the end anchors the pattern to the project root
+        if '/' in line:
+            regex = '^' + _translate(line.lstrip('/')) + '$'
+        else:
+            regex = '^(?:.*/)?' + _translate(line) + '$'
+        self._rules.append((re.compile(regex), negate, dir_only))
+
+    def is_ignored(self, rel_path, is_dir=False):
+        """Check a project-relative path (using '/' separators) against the rules"""
+        ignored = False
+        for regex, negate, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            # The last matching pattern wins
+            if regex.match(rel_path):
+                ignored = not negate
+        return ignored
+
+def iter_entries(path, rel, rules=None, ignore=()):
+    """Yield (entry, is_dir) for one directory, skipping hidden and ignored entries"""
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                # Skip hidden files/folders (like .git, .venv, or __pycache__)
+                if entry.name.startswith('.'):
+                    continue
+                if entry.path in ignore:
+                    continue
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:
+                    continue
+                if rules is not None:
+                    rel_path = f'{rel}/{entry.name}' if rel else entry.name
+                    if rules.is_ignored(rel_path, is_dir):
+                        continue
+                yield entry, is_dir
+    except OSError:
+        pass
+
+def scan_directory(path, rel, rules=None, ignore=()):
+    """List one directory, returning (newest file mtime, kept sub-directory names)
+
+    Hidden entries, entries matched by rules and the absolute paths in ignore
+    are pruned before anything is stat'ed or descended into.
+    """
+    files_max = 0
+    subdirs = []
+    stats = 0
+    for entry, is_dir in iter_entries(path, rel, rules, ignore):
+        if is_dir:
+            subdirs.append(entry.name)
+            continue
+        stats += 1
+        try:
+            mtime = entry.stat().st_mtime
+        except OSError:
+            # Handle cases where files might be deleted/locked during scan
+            continue
+        if mtime > files_max:
+            files_max = mtime
+    subdirs.sort()
+    count('dirs_listed')
+    count('files_stat', stats)
+    return files_max, subdirs
+
+def walk_files(project_path, rules=None):
+    """Yield (relative path, stat result) for every file in a project that isn't pruned"""
+    stack = ['']
+    while stack:
+        rel = stack.pop()
+        path = os.path.join(project_path, rel) if rel else str(project_path)
+        stats = 0
+        for entry, is_dir in iter_entries(path, rel, rules):
+            rel_path = f'{rel}/{entry.name}' if rel else entry.name
+            if is_dir:
+                stack.append(rel_path)
+                continue
+            stats += 1
+            try:
+                yield rel_path, entry.stat()
+            except OSError:
+                continue
+        count('dirs_listed')
+        count('files_stat', stats)
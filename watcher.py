@@ -0,0 +1,251 @@
+"""
+inotify-based change watcher for the daemon mode.
+
+Every directory the walker would scan gets a watch (hidden and ignored
+directories are pruned, as in a scan), and project group folders are
+watched for projects being added or removed. A project's git metadata
+(HEAD, the index, packed-refs and branch refs) is watched as well, since
+commits and checkouts can leave the work tree alone. ``wait`` blocks until
+something changes, collects further events for a short debounce period and
+returns the affected projects with the directories that changed in them.
+
+inotify is Linux only; ``Inotify.available()`` reports whether it can be
+used so the daemon can fall back to periodic rescans.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+
+from git_meta import find_git_dir
+from walker import iter_entries
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+
+PROJECT_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+                | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+GROUP_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF
+# git writes a .lock file and renames it over the original
+GIT_MASK = IN_CLOSE_WRITE | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+
+# Files in the git dir (and common dir, for worktrees) that change on commit, checkout or reset
+GIT_FILES = {'HEAD', 'index', 'packed-refs'}
+
+_event_header = struct.Struct('iIII')
+
+class Inotify:
+    """Thin ctypes wrapper around the inotify system calls"""
+
+    _libc = None
+
+    @classmethod
+    def _load_libc(cls):
+        if cls._libc is None:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+            cls._libc = libc
+        return cls._libc
+
+    @classmethod
+    def available(cls):
+        try:
+            return hasattr(cls._load_libc(), 'inotify_init1')
+        except OSError:
+            return False
+
+    def __init__(self):
+        self.libc = self._load_libc()
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path, mask):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def read_events(self, timeout):
+        """Yield (wd, mask, name) for pending events, waiting up to timeout seconds"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _event_header.unpack_from(data, offset)
+            offset += _event_header.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            yield wd, mask, name
+
+    def close(self):
+        os.close(self.fd)
+
+class ProjectWatcher:
+    """Watches project trees and project groups, reporting which projects changed"""
+
+    def __init__(self, rules_for_project, debounce=2, ignore_paths=()):
+        self.inotify = Inotify()
+        self.rules_for_project = rules_for_project
+        self.debounce = debounce
+        # Absolute paths never watched, such as the dashboard's own output folder
+        self.ignore_paths = {str(path) for path in ignore_paths}
+        # wd -> (project path or None for a group folder, directory, path relative to the project)
+        self.watches = {}
+        # wd -> (projects sharing the git directory, directory, whether it holds branch refs)
+        self.git_watches = {}
+        self.rules = {}
+        self.exhausted = False
+
+    def _add_watch(self, path, mask):
+        try:
+            return self.inotify.add_watch(path, mask)
+        except OSError as e:
+            if e.errno == errno.ENOSPC and not self.exhausted:
+                self.exhausted = True
+                print("inotify watch limit reached (fs.inotify.max_user_watches); "
+                      "some changes will only be seen by the periodic rescan")
+            return None
+
+    def _add(self, path, mask, project, rel):
+        wd = self._add_watch(path, mask)
+        if wd is not None:
+            self.watches[wd] = (project, path, rel)
+
+    def _add_git(self, path, project, refs):
+        wd = self._add_watch(path, GIT_MASK)
+        if wd is not None:
+            # Worktrees of one repository share its common dir
+            self.git_watches.setdefault(wd, (set(), path, refs))[0].add(project)
+
+    def _watch_refs(self, project, root):
+        for path, _, _ in os.walk(root):
+            self._add_git(path, project, True)
+
+    def _watch_git(self, project):
+        git_dir, common_dir = find_git_dir(project)
+        if git_dir is None:
+            return
+        for path in {git_dir, common_dir}:
+            self._add_git(path, project, False)
+        self._watch_refs(project, os.path.join(common_dir, 'refs', 'heads'))
+
+    def _watch_tree(self, project, root, rel):
+        stack = [(root, rel)]
+        rules = self.rules.get(project)
+        while stack:
+            path, rel = stack.pop()
+            self._add(path, PROJECT_MASK, project, rel)
+            for entry, is_dir in iter_entries(path, rel, rules, self.ignore_paths):
+                if is_dir:
+                    stack.append((entry.path, f'{rel}/{entry.name}' if rel else entry.name))
+
+    def watch_project(self, project):
+        project = str(project)
+        self.rules[project] = self.rules_for_project(project)
+        self._watch_tree(project, project, '')
+        self._watch_git(project)
+
+    def watch_group(self, group):
+        self._add(str(group), GROUP_MASK, None, '')
+
+    def _is_relevant(self, project, rel, name, is_dir):
+        if name.startswith('.'):
+            # Hidden files (editor swap files, .git internals) don't count,
+            # except a changed .gitignore which changes what is scanned
+            return name == '.gitignore' and not rel
+        rules = self.rules.get(project)
+        path = f'{rel}/{name}' if rel else name
+        return rules is None or not rules.is_ignored(path, is_dir)
+
+    def wait(self, timeout):
+        """Wait for changes, returning (changed projects, group folders changed, overflowed)
+
+        Changed projects map to the set of directories (relative to the
+        project) that had events, so their cached scans can be dropped.
+        """
+        changed = {}
+        groups_changed = False
+        overflow = False
+        deadline = None
+        remaining = timeout
+        while True:
+            for wd, mask, name in self.inotify.read_events(remaining):
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                    continue
+                git_watch = self.git_watches.get(wd)
+                if git_watch is not None:
+                    projects, path, refs = git_watch
+                    if mask & IN_IGNORED:
+                        del self.git_watches[wd]
+                    elif refs and mask & IN_ISDIR:
+                        # Branch names with slashes live in sub-folders
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            for project in projects:
+                                self._watch_refs(project, os.path.join(path, name))
+                    elif (not name.endswith('.lock')) if refs else name in GIT_FILES:
+                        # Nothing in the work tree changed, so no directories to rescan
+                        for project in projects:
+                            changed.setdefault(project, set())
+                    continue
+                watch = self.watches.get(wd)
+                if watch is None:
+                    continue
+                if mask & IN_IGNORED:
+                    # The directory is gone; the kernel dropped the watch
+                    del self.watches[wd]
+                    continue
+                project, path, rel = watch
+                is_dir = bool(mask & IN_ISDIR)
+                if name and os.path.join(path, name) in self.ignore_paths:
+                    continue
+                if project is None:
+                    groups_changed = True
+                    continue
+                if not name or self._is_relevant(project, rel, name, is_dir):
+                    changed.setdefault(project, set()).add(rel)
+                    if name == '.gitignore' and not rel:
+                        self.rules[project] = self.rules_for_project(project)
+                if is_dir and mask & (IN_CREATE | IN_MOVED_TO) and self._is_relevant(project, rel, name, True):
+                    self._watch_tree(project, os.path.join(path, name), f'{rel}/{name}' if rel else name)
+
+            if not (changed or groups_changed or overflow):
+                # Nothing yet: this was the full wait
+                return changed, groups_changed, overflow
+            # Something changed; keep collecting until things settle
+            now = time.monotonic()
+            if deadline is None:
+                deadline = now + self.debounce
+            remaining = deadline - now
+            if remaining <= 0:
+                return changed, groups_changed, overflow
+
+    def close(self):
+        self.inotify.close()
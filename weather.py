@@ -0,0 +1,177 @@
+"""
+Open-Meteo client with a persistent session and an on-disk response cache.
+
+Responses younger than the TTL are served straight from the cache. Older
+ones are refreshed in the foreground first, except in a long-running process
+(``background=True``): there somewhat older ones are still served while a
+background refresh updates the cache for the next render
+(stale-while-revalidate), and only responses more than four TTLs old are
+refreshed first. If the API can't be reached the last good response is used,
+so the card shows an aged reading instead of an error.
+"""
+
+import threading
+import time
+
+import requests
+
+from cache import load_json, save_json
+from profiling import count
+
+API_URL = "https://api.open-meteo.com/v1/forecast"
+CACHE_FILE = "weather.json"
+
+class WeatherClient:
+    """Fetches and caches Open-Meteo forecasts for one set of query parameters"""
+
+    def __init__(self, api_url=API_URL, ttl=900, timeout=10, background=False):
+        self.api_url = api_url
+        self.ttl = ttl
+        self.timeout = timeout
+        # Refresh aging responses in the background, for processes that render again later
+        self.background = background
+        self.session = requests.Session()
+        self.cached = load_json(CACHE_FILE)
+        self.lock = threading.Lock()
+        self.refresh_thread = None
+
+    def _fetch(self, params):
+        response = self.session.get(self.api_url, params=params, timeout=self.timeout)
+        count('http_requests')
+        count('bytes_fetched', len(response.content))
+        response.raise_for_status()
+        entry = {'params': params, 'fetched_at': time.time(), 'data': response.json()}
+        with self.lock:
+            self.cached = entry
+        save_json(CACHE_FILE, entry)
+        return entry
+
+    def _refresh(self, params):
+        try:
+            self._fetch(params)
+        except Exception as e:
+            print(f"Error refreshing weather data: {e}")
+        finally:
+            with self.lock:
+                self.refresh_thread = None
+
+    def get(self, params, max_age=None):
+        """Return (response data, fetched at timestamp, is stale)
+
+        With max_age (seconds), a cached response at least that old is
+        refreshed in the foreground even if it is younger than the TTL, for
+        callers that refresh on their own schedule. Raises if there is
+        neither a cached response nor a reachable API.
+        """
+        with self.lock:
+            cached = self.cached
+        if cached is not None and cached.get('params') != params:
+            # The location or units changed, so the cached reading doesn't apply
+            cached = None
+
+        if cached is None:
+            entry = self._fetch(params)
+            return entry['data'], entry['fetched_at'], False
+
+        age = time.time() - cached['fetched_at']
+        due = max_age is not None and age >= max_age
+        if age < self.ttl and not due:
+            return cached['data'], cached['fetched_at'], False
+
+        if age > self.ttl * 4 or not self.background or due:
+            # Too old to show without trying first, there is no later render to
+            # show a background refresh in, or the caller's schedule asks for a
+            # new reading now; fall back to it if the API is down
+            try:
+                entry = self._fetch(params)
+                return entry['data'], entry['fetched_at'], False
+            except Exception as e:
+                print(f"Error fetching weather data, using last good reading: {e}")
+                return cached['data'], cached['fetched_at'], True
+
+        # Serve the old reading now and refresh it for the next render
+        with self.lock:
+            if self.refresh_thread is None:
+                self.refresh_thread = threading.Thread(
+                    target=self._refresh, args=(params,), name="weather-refresh"
+                )
+                self.refresh_thread.start()
+        return cached['data'], cached['fetched_at'], True
+
+# Hourly variables requested when the forecast summary is enabled
+HOURLY_FIELDS = 'temperature_2m,precipitation,weather_code'
+
+def summarize_forecast(data, precipitation_threshold=0.1, max_windows=3):
+    """Reduce Open-Meteo hourly arrays to the values shown on the weather card
+
+    Works on whole NumPy arrays: daily min/max come from reduceat over the
+    day boundaries, precipitation windows from the edges of a boolean mask and
+    the next weather change from the first differing code after the current
+    hour. Returns a dict of WeatherResponse fields (empty if there is no
+    hourly data).
+    """
+    import numpy as np
+
+    hourly = data.get('hourly') or {}
+    if not hourly.get('time'):
+        return {}
+
+    times = np.array(hourly['time'], dtype='datetime64[m]')
+    temperature = np.array(hourly.get('temperature_2m', []), dtype=float)
+    precipitation = np.nan_to_num(np.array(hourly.get('precipitation', []), dtype=float))
+    codes = np.array(hourly.get('weather_code', []), dtype=float)
+
+    current_time = (data.get('current') or {}).get('time')
+    now = np.datetime64(current_time, 'm') if current_time else times[0]
+    today = now.astype('datetime64[D]')
+
+    summary = {}
+
+    # Daily min/max: one reduceat per statistic over the start index of each day
+    days = times.astype('datetime64[D]')
+    day_values, day_starts = np.unique(days, return_index=True)
+    if len(temperature) == len(times):
+        day_min = np.fmin.reduceat(temperature, day_starts)
+        day_max = np.fmax.reduceat(temperature, day_starts)
+        for name, offset in (('today', 0), ('tomorrow', 1)):
+            match = np.flatnonzero(day_values == today + offset)
+            if match.size and not np.isnan(day_min[match[0]]):
+                summary[f'{name}_min'] = round(float(day_min[match[0]]))
+                summary[f'{name}_max'] = round(float(day_max[match[0]]))
+
+    # Only look ahead from the current hour
+    start = int(np.searchsorted(times, now.astype('datetime64[h]'), side='left'))
+
+    # Precipitation windows: rising/falling edges of the "wet hour" mask
+    if len(precipitation) == len(times):
+        wet = precipitation[start:] >= precipitation_threshold
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], wet, [False])).astype(np.int8)))
+        starts, ends = edges[0::2], edges[1::2]
+        cumulative = np.concatenate(([0.0], np.cumsum(precipitation[start:])))
+        totals = cumulative[ends] - cumulative[starts]
+        windows = []
+        for window_start, window_end, total in zip(starts[:max_windows], ends[:max_windows], totals):
+            window_day = times[start + window_start].astype('datetime64[D]')
+            if window_day == today:
+                day = 'today'
+            elif window_day == today + 1:
+                day = 'tomorrow'
+            else:
+                day = str(window_day)
+            windows.append({
+                'day': day,
+                'start': str(times[start + window_start])[11:16],
+                'end': str(times[start + window_end - 1] + np.timedelta64(1, 'h'))[11:16],
+                'amount': round(float(total), 1),
+            })
+        summary['precipitation_windows'] = windows
+
+    # Next weather change: first hour whose code differs from the current hour
+    if len(codes) == len(times) and start < len(codes):
+        changed = np.flatnonzero(codes[start:] != codes[start])
+        if changed.size:
+            index = start + int(changed[0])
+            summary['next_change_code'] = int(codes[index])
+            summary['next_change_time'] = str(times[index])[11:16]
+
+    return summary